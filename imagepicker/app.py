@@ -1,8 +1,10 @@
 from fastapi import FastAPI
 
 from src.Config.db import engine, Base
-from src.Routers.v1.imagepicker_router import router as user_router
+from src.Routers.v1.imagepicker_router import router as user_router, MAIN_FOLDER
 from src.Helpers.MiddlewareHelper import MiddlewareHelper
+from src.Helpers.ImageIndex import ImageIndexWatcher
+from src.Helpers.LabelSampler import LabelSampler
 
 app = FastAPI()
 
@@ -16,5 +18,14 @@ async def startup():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
+    await ImageIndexWatcher.start(MAIN_FOLDER)
+    await LabelSampler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await LabelSampler.stop()
+    await ImageIndexWatcher.stop()
+
 
 app.include_router(user_router)
\ No newline at end of file
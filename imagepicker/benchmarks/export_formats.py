@@ -0,0 +1,98 @@
+"""
+Размер выгрузки и время разбора у потребителя: CSV (как сейчас, и с gzip) против Arrow IPC и Parquet.
+Строки синтетические, по форме таблицы imagepicker, и идут пачками по EXPORT_CHUNK_SIZE
+через те же генераторы, что и эндпоинты /export-*; база не нужна.
+Разбор — как у потребителей: pandas.read_csv для CSV, pyarrow для Arrow/Parquet
+(с переводом в pandas.DataFrame). Для замера нужен pandas, в сервис он не входит.
+
+Запуск из папки imagepicker:
+    python -m benchmarks.export_formats --rows 10000000
+    python -m benchmarks.export_formats --rows 1000000 --defects mask
+"""
+import argparse
+import asyncio
+import gc
+import os
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+
+async def synthetic_rows(total: int, chunk_size: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    # Изображения размечают по нескольку раз, пользователей заметно меньше, чем изображений
+    images = [f"{uuid.UUID(int=int(value)).hex}.jpg" for value in rng.integers(0, 2 ** 63, total // 3 + 1)]
+    users = [uuid.UUID(int=int(value)).hex for value in rng.integers(0, 2 ** 63, max(total // 200, 1))]
+    for start in range(0, total, chunk_size):
+        size = min(chunk_size, total - start)
+        ids = range(start + 1, start + size + 1)
+        image_uids = [images[i] for i in rng.integers(0, len(images), size)]
+        user_uids = [users[i] for i in rng.integers(0, len(users), size)]
+        defects = (rng.random((8, size)) < 0.15).tolist()
+        yield list(zip(ids, image_uids, user_uids, *defects))
+        await asyncio.sleep(0)
+
+
+async def export(chunks, path: str) -> float:
+    started = time.perf_counter()
+    with open(path, "wb") as f:
+        async for chunk in chunks:
+            f.write(chunk)
+    return time.perf_counter() - started
+
+
+def parse(name: str, path: str):
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    started = time.perf_counter()
+    if name.startswith("csv"):
+        frame = pd.read_csv(path, compression="gzip" if name.endswith("gzip") else None)
+    elif name == "arrow":
+        with pa.memory_map(path) as source:
+            frame = pa.ipc.open_stream(source).read_all().to_pandas()
+    else:
+        frame = pq.read_table(path).to_pandas()
+    elapsed = time.perf_counter() - started
+    dtypes = ",".join(sorted({str(dtype) for dtype in frame.dtypes}))
+    rows = len(frame)
+    del frame
+    gc.collect()
+    return elapsed, rows, dtypes
+
+
+async def main(args):
+    for name, value in (("DB_DRIVER", "postgresql+asyncpg"), ("DB_HOST", "localhost"), ("DB_PORT", "5432")):
+        os.environ.setdefault(name, value)
+    from src.Helpers.Export import EXPORT_CHUNK_SIZE, arrow_chunks, csv_chunks, gzip_chunks, parquet_chunks
+
+    def rows():
+        return synthetic_rows(args.rows, EXPORT_CHUNK_SIZE)
+
+    formats = {
+        "csv": lambda: csv_chunks(rows()),
+        "csv+gzip": lambda: gzip_chunks(csv_chunks(rows())),
+        "arrow": lambda: arrow_chunks(rows(), args.defects),
+        "parquet": lambda: parquet_chunks(rows(), args.defects),
+    }
+    print(f"{args.rows} rows, defects as {args.defects} in Arrow/Parquet")
+    with tempfile.TemporaryDirectory(prefix="imagepicker-export-") as folder:
+        for name, make_chunks in formats.items():
+            path = os.path.join(folder, name)
+            export_seconds = await export(make_chunks(), path)
+            size = os.path.getsize(path)
+            parse_seconds, parsed_rows, dtypes = parse(name, path)
+            assert parsed_rows == args.rows, parsed_rows
+            print(f"{name:<9} size={size / 2 ** 20:9.1f} MiB export={export_seconds:7.1f} s "
+                  f"parse={parse_seconds:6.2f} s dtypes={dtypes}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--defects", choices=("bool", "mask"), default="bool")
+    asyncio.run(main(parser.parse_args()))
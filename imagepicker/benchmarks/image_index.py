@@ -0,0 +1,115 @@
+"""
+Задержка /get-test до и после индекса изображений: прежний обход папки
+MAIN_FOLDER.glob("*.*") на каждый запрос против выбора из ImageIndex.
+Папка с пустыми файлами создаётся во временном каталоге (или берётся --folder),
+запросы идут через ASGI-транспорт httpx без сети и без базы данных.
+
+Запуск из папки imagepicker:
+    python -m benchmarks.image_index --files 500000
+    python -m benchmarks.image_index --folder /data/images --glob-requests 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def create_files(folder: Path, count: int):
+    existing = len(os.listdir(folder))
+    for i in range(existing, count):
+        os.close(os.open(folder / f"{i:08d}.jpg", os.O_CREAT | os.O_WRONLY, 0o644))
+
+
+async def measure(client, url: str, requests: int) -> list:
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get(url)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text
+    return latencies
+
+
+def report(name: str, latencies: list):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<10} requests={len(latencies):<6} p50={statistics.median(latencies) * 1000:10.3f} ms "
+          f"p99={p99 * 1000:10.3f} ms")
+
+
+async def main(args):
+    temp_dir = None
+    if args.folder:
+        folder = Path(args.folder)
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="imagepicker-bench-")
+        folder = Path(temp_dir)
+        started = time.perf_counter()
+        create_files(folder, args.files)
+        print(f"Created {args.files} files in {time.perf_counter() - started:.1f} s")
+
+    # Роутер читает пути и параметры базы из окружения при импорте; база в замере не используется
+    os.environ["PATH_DATA"] = str(folder)
+    os.environ.setdefault("PATH_READY_DATA_DATA", str(folder))
+    # Без файла эталонной разметки валидационные изображения не выдаются
+    os.environ["PATH_READY_DATA_MARKUP"] = os.path.join(str(folder), "missing-markup.csv")
+    for name, value in (("DB_DRIVER", "postgresql+asyncpg"), ("DB_HOST", "localhost"), ("DB_PORT", "5432")):
+        os.environ.setdefault(name, value)
+
+    import httpx
+    from fastapi import FastAPI, HTTPException
+
+    from src.Helpers.ImageIndex import ImageIndexWatcher
+    from src.Routers.v1 import imagepicker_router
+
+    app = FastAPI()
+    app.include_router(imagepicker_router.router)
+
+    @app.get("/get-test-glob")
+    async def get_random_image_glob():
+        # Реализация /get-test до появления индекса
+        files = list(imagepicker_router.MAIN_FOLDER.glob("*.*"))
+        if not files:
+            raise HTTPException(status_code=404, detail="No images found in the main folder.")
+        return {"uid": random.choice(files).name}
+
+    started = time.perf_counter()
+    await ImageIndexWatcher.start(folder)
+    print(f"Index built in {time.perf_counter() - started:.2f} s: {len(ImageIndexWatcher.index)} images")
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await measure(client, "/get-test", 10)  # Прогрев
+            report("glob", await measure(client, "/get-test-glob", args.glob_requests))
+            report("index", await measure(client, "/get-test", args.index_requests))
+
+            # Обновление индекса после изменения папки
+            names = [f"new-{i}.jpg" for i in range(1000)]
+            for name in names:
+                (folder / name).touch()
+            started = time.perf_counter()
+            await ImageIndexWatcher.refresh()
+            print(f"Refresh after adding 1000 files: {time.perf_counter() - started:.2f} s, "
+                  f"{len(ImageIndexWatcher.index)} images")
+            for name in names:
+                (folder / name).unlink()
+            await ImageIndexWatcher.refresh()
+    finally:
+        await ImageIndexWatcher.stop()
+        if temp_dir:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=500_000, help="Сколько файлов создать во временной папке")
+    parser.add_argument("--folder", help="Существующая папка с изображениями вместо временной")
+    parser.add_argument("--glob-requests", type=int, default=10)
+    parser.add_argument("--index-requests", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,109 @@
+"""
+Время выбора изображения LabelSampler.choose на большой папке.
+Разметки генерируются синтетически (без базы): часть изображений уже размечена
+1..LABEL_TARGET_COUNT раз, у одного «активного» пользователя много собственных разметок.
+Замер идёт по сценариям: есть неразмеченные изображения; все размечены хотя бы раз;
+все набрали цель. Печатаются p50/p99 задержки выбора и заполненность корзин.
+
+Запуск из папки imagepicker:
+    python -m benchmarks.label_sampler --images 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.image_index import create_files
+
+
+def measure(sampler, users: list, requests: int) -> tuple:
+    latencies = []
+    for _ in range(requests):
+        user = random.choice(users)
+        started = time.perf_counter()
+        uid = sampler.choose(user)
+        latencies.append(time.perf_counter() - started)
+        assert uid is not None
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+
+def label(sampler, names: list, start_id: int, users: list, count: int) -> int:
+    row_id = start_id
+    for uid in names:
+        for user in random.sample(users, count):
+            row_id += 1
+            sampler._apply(row_id, uid, user)
+    return row_id
+
+
+async def main(args):
+    os.environ.setdefault("LABEL_TARGET_COUNT", str(args.target))
+    for name, value in (("DB_DRIVER", "postgresql+asyncpg"), ("DB_HOST", "localhost"), ("DB_PORT", "5432")):
+        os.environ.setdefault(name, value)
+
+    from src.Helpers.ImageIndex import ImageIndex, ImageIndexWatcher
+    from src.Helpers.LabelSampler import LABEL_TARGET_COUNT, LabelSampler
+
+    temp_dir = None
+    if args.folder:
+        folder = Path(args.folder)
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="imagepicker-bench-")
+        folder = Path(temp_dir)
+        started = time.perf_counter()
+        create_files(folder, args.images)
+        print(f"Created {args.images} files in {time.perf_counter() - started:.1f} s")
+
+    try:
+        await ImageIndexWatcher.start(folder)
+        # Счётчики заполняются напрямую, без базы
+        LabelSampler._buckets = [ImageIndex() for _ in range(LABEL_TARGET_COUNT + 1)]
+        ImageIndexWatcher.subscribe(LabelSampler._on_images_changed)
+
+        names = ImageIndexWatcher.index.names()
+        names = sorted(names)
+        random.seed(0)
+        random.shuffle(names)
+        users = [f"user-{i}" for i in range(args.users)]
+        active = "user-active"
+
+        row_id = 0
+        labelled = int(len(names) * args.labelled)
+        row_id = label(LabelSampler, names[:labelled], row_id, users, 1)
+        # Активный пользователь разметил часть изображений сам
+        for uid in names[:args.active_labels]:
+            row_id += 1
+            LabelSampler._apply(row_id, uid, active)
+
+        scenarios = [
+            ("unlabelled left", None),
+            ("all labelled once", lambda: label(LabelSampler, names[labelled:], row_id, users, 1)),
+            ("all at target", lambda: label(LabelSampler, names, row_id * 2, users, LABEL_TARGET_COUNT - 1)),
+        ]
+        for name, prepare in scenarios:
+            if prepare is not None:
+                prepare()
+            p50, p99 = measure(LabelSampler, users + [active] * len(users), args.requests)
+            print(f"{name:<18} buckets={LabelSampler.bucket_sizes()} "
+                  f"p50={p50 * 1e6:8.1f} us p99={p99 * 1e6:8.1f} us")
+    finally:
+        await ImageIndexWatcher.stop()
+        if temp_dir:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=1_000_000, help="Сколько файлов создать во временной папке")
+    parser.add_argument("--folder", help="Существующая папка с изображениями вместо временной")
+    parser.add_argument("--target", type=int, default=3, help="LABEL_TARGET_COUNT")
+    parser.add_argument("--labelled", type=float, default=0.5, help="Доля изображений, уже размеченных один раз")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--active-labels", type=int, default=50_000, help="Разметок у активного пользователя")
+    parser.add_argument("--requests", type=int, default=20_000)
+    asyncio.run(main(parser.parse_args()))
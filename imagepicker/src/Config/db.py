@@ -8,8 +8,30 @@ load_dotenv()
 DATABASE_URL = (f"{os.getenv('DB_DRIVER')}://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@"
                 f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}")
 
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Параметры движка и пула из переменных DB_* (значения по умолчанию и смысл — как в web/config.py)
+ENGINE_OPTIONS = dict(
+    echo=_env_bool("DB_ECHO", False),
+    pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "2")),
+    pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+    connect_args={
+        "prepared_statement_cache_size": int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500")),
+        "server_settings": {"statement_timeout": os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000")},
+    },
+)
+
 # Создаем асинхронный движок для подключения к базе данных
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_async_engine(DATABASE_URL, **ENGINE_OPTIONS)
 
 # Создаем асинхронную фабрику сессий для работы с базой данных
 AsyncSessionLocal = sessionmaker(
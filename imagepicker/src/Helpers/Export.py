@@ -0,0 +1,178 @@
+import csv
+import io
+import logging
+import os
+import zlib
+from io import StringIO
+from typing import AsyncIterator, List, Optional, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select
+
+from src.Config.db import AsyncSessionLocal, engine
+from src.Models.Imagepicker import Imagepicker
+
+logger = logging.getLogger(__name__)
+
+# Сколько строк за раз читается из серверного курсора и отдаётся клиенту одним фрагментом
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '5000'))
+# Сколько строк собирается в одну группу строк Parquet (мелкие группы ухудшают сжатие и чтение)
+EXPORT_PARQUET_ROW_GROUP_SIZE = int(os.getenv('EXPORT_PARQUET_ROW_GROUP_SIZE', '100000'))
+
+DEFECT_COLUMNS = [f"defect_{i}" for i in range(8)]
+EXPORT_COLUMNS = ["id", "uid", "userUid", *DEFECT_COLUMNS]
+
+# Дефекты в колоночных форматах: восемь булевых столбцов или один uint8, где бит i — defect_i
+DEFECT_SHIFTS = np.arange(8, dtype=np.uint8)
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+
+async def stream_rows(
+        since_id: int = 0,
+        until_id: Optional[int] = None,
+        chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> AsyncIterator[List[Sequence]]:
+    """
+    Строки imagepicker с since_id < id <= until_id по возрастанию id, пачками по chunk_size.
+    Чтение идёт серверным курсором, поэтому в памяти одновременно только одна пачка.
+    Сессия своя: зависимость get_session закрывается раньше, чем ответ дочитан клиентом
+    """
+    query = (
+        select(*(getattr(Imagepicker, column) for column in EXPORT_COLUMNS))
+        .where(Imagepicker.id > since_id)
+        .order_by(Imagepicker.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    if until_id is not None:
+        query = query.where(Imagepicker.id <= until_id)
+    async with AsyncSessionLocal(bind=engine) as session:
+        result = await session.stream(query)
+        async for partition in result.partitions():
+            yield partition
+
+
+async def csv_chunks(batches: AsyncIterator[List[Sequence]]) -> AsyncIterator[bytes]:
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_COLUMNS)
+    exported = 0
+    async for rows in batches:
+        writer.writerows(rows)
+        exported += len(rows)
+        yield output.getvalue().encode()
+        output.seek(0)
+        output.truncate()
+    # Пустая выгрузка (нет новых строк) всё равно содержит заголовок
+    if output.tell():
+        yield output.getvalue().encode()
+    logger.info(f"Exported {exported} rows to CSV.")
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    # wbits=16+MAX_WBITS — формат gzip, а не «голый» zlib
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_schema(layout: str) -> pa.Schema:
+    fields = [pa.field("id", pa.int32(), nullable=False),
+              pa.field("uid", pa.string(), nullable=False),
+              pa.field("userUid", pa.string(), nullable=False)]
+    if layout == "mask":
+        fields.append(pa.field("defects", pa.uint8(), nullable=False))
+    else:
+        fields.extend(pa.field(column, pa.bool_(), nullable=False) for column in DEFECT_COLUMNS)
+    return pa.schema(fields, metadata={"defects": "bit i = defect_i" if layout == "mask" else "columns"})
+
+
+def record_batch(rows: List[Sequence], schema: pa.Schema) -> pa.RecordBatch:
+    """
+    Пачка строк (id, uid, userUid, defect_0..defect_7) -> RecordBatch по схеме export_schema
+    """
+    ids, uids, user_uids, *defects = zip(*rows)
+    columns = [pa.array(ids, pa.int32()), pa.array(uids, pa.string()), pa.array(user_uids, pa.string())]
+    if schema.names[-1] == "defects":
+        bits = np.array(defects, dtype=np.uint8)  # [8, N]
+        columns.append(pa.array((bits << DEFECT_SHIFTS[:, None]).sum(axis=0, dtype=np.uint8)))
+    else:
+        columns.extend(pa.array(values, pa.bool_()) for values in defects)
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+class ChunkSink(io.RawIOBase):
+    """
+    Файл только для записи, содержимое которого забирается по частям.
+    tell() возвращает общее число записанных байт: по нему Parquet считает смещения в футере
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._parts: List[bytes] = []
+        self._written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._written += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._written
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+async def arrow_chunks(batches: AsyncIterator[List[Sequence]], layout: str = "bool") -> AsyncIterator[bytes]:
+    """
+    Формат Arrow IPC stream: схема, затем по сообщению на каждую пачку строк
+    """
+    schema = export_schema(layout)
+    sink = ChunkSink()
+    exported = 0
+    with pa.ipc.new_stream(sink, schema) as writer:
+        async for rows in batches:
+            writer.write_batch(record_batch(rows, schema))
+            exported += len(rows)
+            yield sink.take()
+    yield sink.take()
+    logger.info(f"Exported {exported} rows to Arrow.")
+
+
+async def parquet_chunks(batches: AsyncIterator[List[Sequence]], layout: str = "bool") -> AsyncIterator[bytes]:
+    """
+    Parquet: пачки копятся до EXPORT_PARQUET_ROW_GROUP_SIZE строк и пишутся группой строк;
+    футер с метаданными групп отдаётся последним фрагментом
+    """
+    schema = export_schema(layout)
+    sink = ChunkSink()
+    pending: List[pa.RecordBatch] = []
+    pending_rows = exported = 0
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for rows in batches:
+            pending.append(record_batch(rows, schema))
+            pending_rows += len(rows)
+            exported += len(rows)
+            if pending_rows >= EXPORT_PARQUET_ROW_GROUP_SIZE:
+                writer.write_table(pa.Table.from_batches(pending), row_group_size=pending_rows)
+                pending, pending_rows = [], 0
+                yield sink.take()
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending), row_group_size=pending_rows)
+    finally:
+        writer.close()
+    yield sink.take()
+    logger.info(f"Exported {exported} rows to Parquet.")
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import os
+import random
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Как часто проверять папку с изображениями на изменения (сек)
+IMAGE_INDEX_POLL_INTERVAL = float(os.getenv('IMAGE_INDEX_POLL_INTERVAL', '2'))
+
+
+def is_image_name(name: str) -> bool:
+    # Те же файлы, что раньше находил MAIN_FOLDER.glob("*.*"): с точкой в имени и не скрытые
+    return '.' in name and not name.startswith('.')
+
+
+def scan_folder(folder: Path) -> Set[str]:
+    with os.scandir(folder) as entries:
+        return {entry.name for entry in entries if is_image_name(entry.name) and entry.is_file()}
+
+
+class ImageIndex:
+    """
+    Список имён изображений для случайного выбора за O(1):
+    массив имён и словарь имя -> позиция в массиве. Удаление переносит
+    последний элемент на место удаляемого, поэтому тоже выполняется за O(1)
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._names: List[str] = []
+        self._positions: Dict[str, int] = {}
+        for name in names:
+            self.add(name)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._positions
+
+    def add(self, name: str):
+        if name not in self._positions:
+            self._positions[name] = len(self._names)
+            self._names.append(name)
+
+    def remove(self, name: str):
+        position = self._positions.pop(name, None)
+        if position is None:
+            return
+        last = self._names.pop()
+        if position < len(self._names):
+            self._names[position] = last
+            self._positions[last] = position
+
+    def names(self) -> Set[str]:
+        return set(self._positions)
+
+    def random_choice(self) -> Optional[str]:
+        if not self._names:
+            return None
+        return self._names[random.randrange(len(self._names))]
+
+    def shuffled(self) -> Iterator[str]:
+        """
+        Все имена в случайном порядке (по снимку на момент вызова).
+        Перемешивание ленивое: каждое следующее имя выбирается за O(1)
+        """
+        names = list(self._names)
+        for i in range(len(names)):
+            j = random.randrange(i, len(names))
+            names[i], names[j] = names[j], names[i]
+            yield names[i]
+
+
+class ImageIndexWatcher:
+    """
+    Поддерживает индекс в актуальном состоянии: индекс строится при старте,
+    затем папка опрашивается раз в IMAGE_INDEX_POLL_INTERVAL секунд.
+    Полное сканирование выполняется только при изменении mtime папки
+    (он меняется при добавлении, удалении и переименовании файлов) и в отдельном потоке.
+    Подписчики получают множества добавленных и удалённых имён при каждом изменении
+    """
+    index = ImageIndex()
+    _folder: Optional[Path] = None
+    _mtime: Optional[int] = None
+    _task: Optional[asyncio.Task] = None
+    _listeners: List[Callable[[Set[str], Set[str]], None]] = []
+
+    @classmethod
+    async def start(cls, folder: Path):
+        cls._folder = folder
+        await cls.refresh()
+        logger.info(f"Image index built: {len(cls.index)} images in {folder}")
+        if cls._task is None:
+            cls._task = asyncio.create_task(cls._poll())
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is not None:
+            cls._task.cancel()
+            try:
+                await cls._task
+            except asyncio.CancelledError:
+                pass
+            cls._task = None
+
+    @classmethod
+    def subscribe(cls, listener: Callable[[Set[str], Set[str]], None]):
+        """
+        Подписка на изменения папки; текущее содержимое индекса сразу передаётся как добавленное
+        """
+        cls._listeners.append(listener)
+        listener(cls.index.names(), set())
+
+    @classmethod
+    def exists(cls, name: str) -> bool:
+        """
+        Есть ли файл на диске; файл, удалённый после последнего опроса, сразу убирается из индекса
+        """
+        if (cls._folder / name).exists():
+            return True
+        cls._apply(set(), {name})
+        return False
+
+    @classmethod
+    def _apply(cls, added: Set[str], removed: Set[str]):
+        removed = {name for name in removed if name in cls.index}
+        for name in removed:
+            cls.index.remove(name)
+        for name in added:
+            cls.index.add(name)
+        if added or removed:
+            for listener in cls._listeners:
+                listener(added, removed)
+
+    @classmethod
+    async def refresh(cls, force: bool = False):
+        mtime = os.stat(cls._folder).st_mtime_ns
+        if mtime == cls._mtime and not force:
+            return
+        # mtime запоминается до сканирования: изменения во время сканирования поймает следующий опрос
+        cls._mtime = mtime
+        current = await asyncio.to_thread(scan_folder, cls._folder)
+        indexed = cls.index.names()
+        cls._apply(current - indexed, indexed - current)
+
+    @classmethod
+    async def _poll(cls):
+        while True:
+            await asyncio.sleep(IMAGE_INDEX_POLL_INTERVAL)
+            try:
+                await cls.refresh()
+            except Exception as e:
+                logger.error(f"Image index refresh failed: {e}")
+
+    @classmethod
+    def random_image(cls, attempts: int = 3) -> Optional[str]:
+        """
+        Случайное изображение из индекса. Файлы, удалённые после последнего опроса,
+        сразу убираются из индекса и выбор повторяется
+        """
+        for _ in range(attempts):
+            name = cls.index.random_choice()
+            if name is None or cls.exists(name):
+                return name
+        return cls.index.random_choice()
@@ -0,0 +1,163 @@
+import asyncio
+import itertools
+import logging
+import os
+import random
+from typing import Dict, List, Optional, Sequence, Set
+
+from sqlalchemy import select
+
+from src.Config.db import engine
+from src.Helpers.ImageIndex import ImageIndex, ImageIndexWatcher
+from src.Models.Imagepicker import Imagepicker
+
+logger = logging.getLogger(__name__)
+
+# Сколько разметок нужно каждому изображению; размеченные столько раз показываются в последнюю очередь
+LABEL_TARGET_COUNT = int(os.getenv('LABEL_TARGET_COUNT', '3'))
+# Как часто подтягивать новые разметки из таблицы imagepicker (сек): их сохраняют и другие воркеры
+LABEL_SAMPLER_REFRESH_INTERVAL = float(os.getenv('LABEL_SAMPLER_REFRESH_INTERVAL', '5'))
+# Сколько случайных попыток делается в корзине, прежде чем обойти её целиком
+LABEL_SAMPLER_ATTEMPTS = 8
+
+VALIDATION_SUFFIX = "_val"
+
+
+class LabelSampler:
+    """
+    Выбор изображения для мини-игры с учётом покрытия разметкой.
+    Изображения папки разложены по корзинам по числу разметок (0 .. LABEL_TARGET_COUNT,
+    последняя — «набрали цель»); выбор идёт из самой младшей корзины, где есть изображение,
+    ещё не размеченное пользователем. Обычно хватает нескольких случайных попыток,
+    и выбор не зависит от числа изображений; корзина обходится целиком, только если они не удались.
+    Счётчики строятся из строк Imagepicker при старте и дальше обновляются
+    инкрементально по id; уже размеченные пользователем изображения ему не показываются
+    """
+    _buckets: List[ImageIndex] = []
+    # uid -> число разных пользователей, разметивших изображение
+    _counts: Dict[str, int] = {}
+    # userUid -> изображения, которые пользователь уже разметил (включая валидационные)
+    _seen: Dict[str, Set[str]] = {}
+    _last_id = 0
+    # id записей, уже учтённых через record() раньше, чем их увидел опрос базы
+    _recorded_ids: Set[int] = set()
+    _task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def start(cls):
+        cls._buckets = [ImageIndex() for _ in range(LABEL_TARGET_COUNT + 1)]
+        await cls.refresh()
+        ImageIndexWatcher.subscribe(cls._on_images_changed)
+        logger.info(f"Label sampler ready: {cls.bucket_sizes()} images per label count")
+        if cls._task is None:
+            cls._task = asyncio.create_task(cls._poll())
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is not None:
+            cls._task.cancel()
+            try:
+                await cls._task
+            except asyncio.CancelledError:
+                pass
+            cls._task = None
+
+    @classmethod
+    def bucket_sizes(cls) -> List[int]:
+        return [len(bucket) for bucket in cls._buckets]
+
+    @classmethod
+    def _bucket(cls, uid: str) -> int:
+        return min(cls._counts.get(uid, 0), LABEL_TARGET_COUNT)
+
+    @classmethod
+    def _on_images_changed(cls, added: Set[str], removed: Set[str]):
+        for uid in removed:
+            cls._buckets[cls._bucket(uid)].remove(uid)
+        for uid in added:
+            cls._buckets[cls._bucket(uid)].add(uid)
+
+    @classmethod
+    def _apply(cls, row_id: int, uid: str, user_uid: str):
+        if row_id in cls._recorded_ids:
+            cls._recorded_ids.discard(row_id)
+            return
+        is_validation = user_uid.endswith(VALIDATION_SUFFIX)
+        if is_validation:
+            user_uid = user_uid[:-len(VALIDATION_SUFFIX)]
+        seen = cls._seen.setdefault(user_uid, set())
+        if uid in seen:
+            return
+        seen.add(uid)
+        if is_validation:
+            # Ответы на валидационные изображения проверяют пользователя и не идут в покрытие
+            return
+
+        old_bucket = cls._bucket(uid)
+        cls._counts[uid] = cls._counts.get(uid, 0) + 1
+        new_bucket = cls._bucket(uid)
+        if new_bucket != old_bucket and uid in cls._buckets[old_bucket]:
+            cls._buckets[old_bucket].remove(uid)
+            cls._buckets[new_bucket].add(uid)
+
+    @classmethod
+    def record(cls, row_id: int, uid: str, user_uid: str):
+        """
+        Учитывает только что сохранённую разметку, не дожидаясь опроса базы
+        """
+        if row_id <= cls._last_id:
+            return
+        cls._apply(row_id, uid, user_uid)
+        cls._recorded_ids.add(row_id)
+
+    @classmethod
+    async def refresh(cls):
+        async with engine.connect() as conn:
+            result = await conn.stream(
+                select(Imagepicker.id, Imagepicker.uid, Imagepicker.userUid)
+                .where(Imagepicker.id > cls._last_id)
+                .order_by(Imagepicker.id)
+            )
+            async for row_id, uid, user_uid in result:
+                cls._apply(row_id, uid, user_uid)
+                cls._last_id = row_id
+
+    @classmethod
+    async def _poll(cls):
+        while True:
+            await asyncio.sleep(LABEL_SAMPLER_REFRESH_INTERVAL)
+            try:
+                await cls.refresh()
+            except Exception as e:
+                logger.error(f"Label sampler refresh failed: {e}")
+
+    @classmethod
+    def choose(cls, user_uid: Optional[str] = None) -> Optional[str]:
+        """
+        Изображение с наименьшим числом разметок, которое пользователь ещё не размечал.
+        Если все подходящие уже размечены им, возвращается любое изображение
+        """
+        seen = cls._seen.get(user_uid, ()) if user_uid else ()
+        for bucket in cls._buckets:
+            if not bucket:
+                continue
+            # Следующая корзина берётся, только если в этой не осталось неразмеченных пользователем
+            probes = (bucket.random_choice() for _ in range(LABEL_SAMPLER_ATTEMPTS))
+            for uid in itertools.chain(probes, bucket.shuffled()):
+                if uid is not None and uid not in seen and ImageIndexWatcher.exists(uid):
+                    return uid
+        return ImageIndexWatcher.random_image()
+
+    @classmethod
+    def choose_validation(cls, validation_images: Sequence[str], user_uid: Optional[str] = None) -> Optional[str]:
+        """
+        Случайное валидационное изображение, по возможности ещё не показанное пользователю
+        """
+        if not validation_images:
+            return None
+        seen = cls._seen.get(user_uid, ()) if user_uid else ()
+        for _ in range(LABEL_SAMPLER_ATTEMPTS):
+            uid = random.choice(validation_images)
+            if uid not in seen:
+                return uid
+        return random.choice(validation_images)
@@ -0,0 +1,118 @@
+import csv
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFECT_COUNT = 8
+# Как часто проверять, не изменился ли файл эталонной разметки (сек)
+VALIDATION_MARKUP_RELOAD_INTERVAL = float(os.getenv('VALIDATION_MARKUP_RELOAD_INTERVAL', '10'))
+
+
+def pack_defects(defects) -> int:
+    """
+    Номера дефектов -> 8-битная маска (бит i — defect_i)
+    """
+    mask = 0
+    for defect in defects:
+        mask |= 1 << defect
+    return mask
+
+
+def parse_flag(value: Optional[str]) -> bool:
+    return (value or "").strip().lower() in ("true", "1", "1.0")
+
+
+def is_blank(value: Optional[str]) -> bool:
+    return not (value or "").strip()
+
+
+class ValidationMarkupTable:
+    """
+    Эталонная разметка: uid -> (упакованная маска дефектов, маска заполненных ячеек defect_i)
+    и маска столбцов defect_i, которые есть в файле. Ответ с эталоном сравнивается только
+    по заполненным ячейкам: пустая ячейка — «нет ответа» и совпадением не считается
+    """
+
+    def __init__(self, masks: Dict[str, Tuple[int, int]] = None, columns: int = 0):
+        self.masks = masks or {}
+        self.columns = columns
+        self.uids: List[str] = list(self.masks)
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "ValidationMarkupTable":
+        masks = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            fields = reader.fieldnames or []
+            if "uid" not in fields:
+                return cls()
+            present = [i for i in range(DEFECT_COUNT) if f"defect_{i}" in fields]
+            for row in reader:
+                # Как и раньше, для повторяющегося uid берётся первая строка
+                if row["uid"] not in masks:
+                    masks[row["uid"]] = (
+                        pack_defects(i for i in present if parse_flag(row[f"defect_{i}"])),
+                        pack_defects(i for i in present if not is_blank(row[f"defect_{i}"])),
+                    )
+        return cls(masks, pack_defects(present))
+
+    def matches(self, uid: str, selected: int) -> Optional[int]:
+        """
+        Маска совпадений ответа пользователя с эталоном: бит i установлен,
+        если ячейка defect_i в эталоне заполнена и defect_i выбран тогда и только тогда,
+        когда он есть в эталоне (как и раньше с pandas, где пустая ячейка — NaN)
+        """
+        reference = self.masks.get(uid)
+        if reference is None:
+            return None
+        defects, answered = reference
+        return ~(selected ^ defects) & answered
+
+
+class ValidationMarkup:
+    """
+    Таблица эталонной разметки из PATH_READY_DATA_MARKUP. Загружается один раз и перечитывается,
+    когда меняется время модификации файла (новые валидационные изображения без перезапуска)
+    """
+    _path: Optional[Path] = None
+    _table: ValidationMarkupTable = ValidationMarkupTable()
+    _mtime: Optional[int] = None
+    _checked_at = 0.0
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> ValidationMarkupTable:
+        if path is not None:
+            cls._path = path
+        try:
+            mtime = os.stat(cls._path).st_mtime_ns
+        except OSError as e:
+            # Уже загруженная таблица остаётся в силе, ошибка пишется один раз
+            if cls._mtime != -1:
+                logger.error(f"Error loading validation data: {e}")
+                cls._mtime = -1
+            return cls._table
+        if mtime == cls._mtime:
+            return cls._table
+
+        try:
+            cls._table = ValidationMarkupTable.from_csv(cls._path)
+            logger.info(f"Loaded {len(cls._table.uids)} validation images from {cls._path.name}")
+            if cls._table.uids and cls._table.columns != (1 << DEFECT_COUNT) - 1:
+                logger.warning(f"Validation markup has only columns {cls._table.columns:08b} of defect_7..defect_0")
+        except (OSError, ValueError, KeyError, csv.Error) as e:
+            # Файл, записанный не до конца, не должен ломать проверку ответов
+            logger.error(f"Error loading validation data: {e}")
+        cls._mtime = mtime
+        return cls._table
+
+    @classmethod
+    def table(cls) -> ValidationMarkupTable:
+        now = time.monotonic()
+        if now - cls._checked_at >= VALIDATION_MARKUP_RELOAD_INTERVAL:
+            cls._checked_at = now
+            cls.load()
+        return cls._table
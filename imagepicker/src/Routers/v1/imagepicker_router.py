@@ -9,10 +9,19 @@ from pathlib import Path
 import logging
 import random
 import os
-import csv
-import pandas as pd
-from io import StringIO
+from typing import Literal, Optional
 from src.Schemas.ImagepickerSchemas import ProcessTestInput, ProcessTestOutput, DefectCountOutput
+from src.Helpers.LabelSampler import LabelSampler
+from src.Helpers.ValidationMarkup import ValidationMarkup, pack_defects
+from src.Helpers.Export import (
+    ARROW_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    arrow_chunks,
+    csv_chunks,
+    gzip_chunks,
+    parquet_chunks,
+    stream_rows,
+)
 from sqlalchemy import func
 from dotenv import load_dotenv
 
@@ -30,40 +39,34 @@ VALIDATION_MARKUP_FILE = Path(os.getenv('PATH_READY_DATA_MARKUP'))
 
 os.makedirs(MAIN_FOLDER, exist_ok=True)
 
-# Загрузка файла с разметкой для валидации
-try:
-    validation_data = pd.read_csv(VALIDATION_MARKUP_FILE)
-    validation_images = list(validation_data['uid'].unique()) if 'uid' in validation_data.columns else []
-    logger.info(f"Loaded {len(validation_images)} validation images from markup.csv")
-except Exception as e:
-    logger.error(f"Error loading validation data: {e}")
-    validation_images = []
+# Загрузка файла с разметкой для валидации (дальше перечитывается при изменении)
+ValidationMarkup.load(VALIDATION_MARKUP_FILE)
 
 defect_types = [5, 0, 6, 2, 7, 3, 1, 4]
 
 
 @router.get("/get-test")
-async def get_random_image():
+async def get_random_image(userUid: Optional[str] = Query(None)):
     logger.info("Received request for a random image.")
 
     # С вероятностью 20% предлагаем валидационное изображение
+    validation_images = ValidationMarkup.table().uids
     use_validation = random.random() < 0.2 and validation_images
 
     if use_validation:
-        # Выбираем случайное валидационное изображение
-        random_validation_image = random.choice(validation_images)
+        # Выбираем случайное валидационное изображение, которое пользователь ещё не проходил
+        random_validation_image = LabelSampler.choose_validation(validation_images, userUid)
         logger.info(f"Selected validation image: {random_validation_image}")
         return {"uid": random_validation_image}
     else:
-        # Стандартная логика выбора обычного изображения
-        files = list(MAIN_FOLDER.glob("*.*"))
-        if not files:
+        # Изображение с наименьшим числом разметок, которое пользователь ещё не размечал
+        random_photo = LabelSampler.choose(userUid)
+        if random_photo is None:
             logger.error("No images found in the main folder.")
             raise HTTPException(status_code=404, detail="No images found in the main folder.")
 
-        random_photo = random.choice(files)
-        logger.info(f"Selected random image: {random_photo.name}")
-        return {"uid": random_photo.name}
+        logger.info(f"Selected random image: {random_photo}")
+        return {"uid": random_photo}
 
 
 @router.get("/photo/{uid}")
@@ -71,7 +74,7 @@ async def serve_photo(uid: str):
     logger.info(f"Received request to serve photo with uid: {uid}")
 
     # Проверяем, является ли это валидационным изображением
-    is_validation = uid in validation_images
+    is_validation = uid in ValidationMarkup.table().masks
 
     if is_validation:
         file_path = READY_DATA_FOLDER / uid
@@ -94,7 +97,8 @@ async def process_test(
     logger.info(f"Processing test for userUid: {input_data.userUid}, uid: {input_data.uid}")
 
     # Проверяем, является ли это валидационным изображением
-    is_validation = input_data.uid in validation_images
+    validation = ValidationMarkup.table()
+    is_validation = input_data.uid in validation.masks
 
     # Если это валидационное изображение, модифицируем userUid для сохранения
     modified_user_uid = f"{input_data.userUid}_val" if is_validation else input_data.userUid
@@ -119,25 +123,12 @@ async def process_test(
 
         # Если это валидационное изображение, сравниваем с эталоном
         if is_validation:
-            # Получаем эталонную разметку для этого изображения
-            validation_row = validation_data[validation_data['uid'] == input_data.uid]
-            if not validation_row.empty:
-                # Для каждого дефекта проверяем совпадение с эталоном
-                for i in range(8):
-                    defect_col = f"defect_{i}"
-                    if defect_col in validation_row.columns:
-                        # Проверяем совпадение: был ли выбран дефект пользователем и есть ли он в эталоне
-                        user_selected = i in target_defects
-                        validation_has_defect = validation_row[defect_col].iloc[0]
-
-                        # True если совпадает (оба True или оба False), иначе False
-                        defect_data[defect_col] = user_selected == validation_has_defect
-                        logger.debug(
-                            f"Validation for {defect_col}: user={user_selected}, validation={validation_has_defect}, match={defect_data[defect_col]}")
-                    else:
-                        logger.warning(f"Column {defect_col} not found in validation data for image {input_data.uid}")
-            else:
-                logger.warning(f"Validation image {input_data.uid} not found in validation data")
+            # Бит i маски совпадений установлен, если выбор defect_i совпал с эталоном
+            matches = validation.matches(input_data.uid, pack_defects(target_defects))
+            for i in range(8):
+                defect_data[f"defect_{i}"] = bool(matches >> i & 1)
+            logger.debug(f"Validation for {input_data.uid}: {bin(matches).count('1')} of "
+                         f"{bin(validation.columns).count('1')} defects match")
         else:
             # Если не валидационное изображение, сохраняем выбранные пользователем дефекты
             for t in target_defects:
@@ -157,6 +148,7 @@ async def process_test(
     try:
         await session.commit()
         logger.info(f"Successfully committed new record for uid: {modified_user_uid}")
+        LabelSampler.record(new_record.id, new_record.uid, new_record.userUid)
     except IntegrityError:
         await session.rollback()
         logger.error("Database error occurred while processing the request.")
@@ -166,30 +158,45 @@ async def process_test(
 
 
 @router.get("/export-csv")
-async def export_csv(session: AsyncSession = Depends(get_session)):
-    logger.info("Exporting data to CSV.")
-    query = select(Imagepicker)
-    result = await session.execute(query)
-    records = result.scalars().all()
-
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(
-        ["id", "uid", "userUid", "defect_0", "defect_1", "defect_2", "defect_3", "defect_4", "defect_5", "defect_6",
-         "defect_7"])
-
-    for record in records:
-        writer.writerow([
-            record.id, record.uid, record.userUid,
-            record.defect_0, record.defect_1, record.defect_2, record.defect_3,
-            record.defect_4, record.defect_5, record.defect_6, record.defect_7
-        ])
-    logger.info("CSV data prepared.")
-
-    output.seek(0)
-    logger.info("Returning CSV file as response.")
-    return StreamingResponse(output, media_type="text/csv",
-                             headers={"Content-Disposition": "attachment; filename=imagepicker_data.csv"})
+async def export_csv(
+        since_id: int = Query(0, ge=0, description="Only rows with id greater than this"),
+        until_id: Optional[int] = Query(None, ge=0, description="Only rows with id up to this one"),
+        compress: bool = Query(False, alias="gzip", description="Gzip content-encoding"),
+):
+    logger.info(f"Exporting data to CSV (since_id={since_id}, until_id={until_id}, gzip={compress}).")
+
+    # Строки читаются серверным курсором и отдаются по мере чтения, без буфера на всю таблицу
+    chunks = csv_chunks(stream_rows(since_id, until_id))
+    headers = {"Content-Disposition": "attachment; filename=imagepicker_data.csv"}
+    if compress:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type="text/csv", headers=headers)
+
+
+@router.get("/export-arrow")
+async def export_arrow(
+        since_id: int = Query(0, ge=0, description="Only rows with id greater than this"),
+        until_id: Optional[int] = Query(None, ge=0, description="Only rows with id up to this one"),
+        defects: Literal["bool", "mask"] = Query("bool", description="Boolean columns or uint8 bitmask"),
+):
+    logger.info(f"Exporting data to Arrow (since_id={since_id}, until_id={until_id}, defects={defects}).")
+
+    # Arrow IPC stream: по record batch на каждую пачку строк из курсора
+    return StreamingResponse(arrow_chunks(stream_rows(since_id, until_id), defects), media_type=ARROW_MEDIA_TYPE,
+                             headers={"Content-Disposition": "attachment; filename=imagepicker_data.arrows"})
+
+
+@router.get("/export-parquet")
+async def export_parquet(
+        since_id: int = Query(0, ge=0, description="Only rows with id greater than this"),
+        until_id: Optional[int] = Query(None, ge=0, description="Only rows with id up to this one"),
+        defects: Literal["bool", "mask"] = Query("bool", description="Boolean columns or uint8 bitmask"),
+):
+    logger.info(f"Exporting data to Parquet (since_id={since_id}, until_id={until_id}, defects={defects}).")
+
+    return StreamingResponse(parquet_chunks(stream_rows(since_id, until_id), defects), media_type=PARQUET_MEDIA_TYPE,
+                             headers={"Content-Disposition": "attachment; filename=imagepicker_data.parquet"})
 
 
 @router.get("/defect-count", response_model=DefectCountOutput)
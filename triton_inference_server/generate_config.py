@@ -0,0 +1,131 @@
+"""
+Генерация config.pbtxt модели для Triton из YAML-профиля (папка profiles).
+
+Запуск из папки triton_inference_server:
+    python generate_config.py profiles/gpu.yaml            # записать model_repository/<name>/config.pbtxt
+    python generate_config.py profiles/cpu.yaml --output -  # напечатать в stdout
+    python generate_config.py profiles/gpu.yaml --check     # проверить, что файл в репозитории актуален
+Структура профиля повторяет ModelConfig из model_config.proto: вложенные словари
+становятся сообщениями, списки словарей — repeated-сообщениями.
+"""
+import argparse
+import json
+import os
+import sys
+
+import yaml
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Поля-перечисления: значения пишутся без кавычек
+ENUM_FIELDS = {"data_type", "kind", "format"}
+# Поля типа map<string, ...>: записываются как повторяющиеся пары key/value
+MAP_FIELDS = {"parameters"}
+
+HEADER = "# Сгенерировано generate_config.py из {profile}, не редактировать вручную\n"
+
+
+def format_scalar(key: str, value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if key in ENUM_FIELDS:
+        return str(value)
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+def format_field(key: str, value, indent: int) -> list:
+    pad = "  " * indent
+    if key in MAP_FIELDS and isinstance(value, dict):
+        lines = []
+        for map_key, map_value in value.items():
+            lines.append(f"{pad}{key} {{")
+            lines.append(f"{pad}  key: {json.dumps(str(map_key))}")
+            lines.extend(format_field("value", map_value, indent + 1))
+            lines.append(f"{pad}}}")
+        return lines
+    if isinstance(value, dict):
+        return [f"{pad}{key} {{", *format_message(value, indent + 1), f"{pad}}}"]
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        lines = [f"{pad}{key} ["]
+        for i, item in enumerate(value):
+            lines.append(f"{pad}  {{")
+            lines.extend(format_message(item, indent + 2))
+            lines.append(f"{pad}  }}" + ("," if i < len(value) - 1 else ""))
+        lines.append(f"{pad}]")
+        return lines
+    if isinstance(value, list):
+        return [f"{pad}{key}: [ {', '.join(format_scalar(key, item) for item in value)} ]"]
+    return [f"{pad}{key}: {format_scalar(key, value)}"]
+
+
+def format_message(message: dict, indent: int = 0) -> list:
+    lines = []
+    for key, value in message.items():
+        lines.extend(format_field(key, value, indent))
+    return lines
+
+
+def validate(profile: dict):
+    """
+    Проверки, которые Triton иначе выдал бы только при загрузке модели
+    """
+    for field in ("name", "max_batch_size", "input", "output"):
+        if field not in profile:
+            raise ValueError(f"Profile is missing '{field}'")
+    if "platform" not in profile and "backend" not in profile:
+        raise ValueError("Profile must set 'platform' or 'backend'")
+
+    max_batch_size = profile["max_batch_size"]
+    batching = profile.get("dynamic_batching")
+    if batching is not None:
+        if max_batch_size < 1:
+            raise ValueError("dynamic_batching requires max_batch_size >= 1")
+        too_large = [size for size in batching.get("preferred_batch_size", []) if size > max_batch_size]
+        if too_large:
+            raise ValueError(f"preferred_batch_size {too_large} exceeds max_batch_size {max_batch_size}")
+
+    for tensor in profile["input"] + profile["output"]:
+        if not {"name", "data_type", "dims"} <= tensor.keys():
+            raise ValueError(f"Tensor definition needs name, data_type and dims: {tensor}")
+
+
+def render(profile: dict, profile_path: str) -> str:
+    validate(profile)
+    return HEADER.format(profile=profile_path) + "\n".join(format_message(profile)) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("profile", help="YAML-профиль из папки profiles")
+    parser.add_argument("--output", help="Путь к config.pbtxt или '-' для stdout "
+                                         "(по умолчанию model_repository/<name>/config.pbtxt)")
+    parser.add_argument("--check", action="store_true", help="Только сравнить с существующим файлом")
+    args = parser.parse_args()
+
+    with open(args.profile, encoding="utf-8") as f:
+        profile = yaml.safe_load(f)
+    profile_path = os.path.relpath(os.path.abspath(args.profile), BASE_DIR)
+    config = render(profile, profile_path)
+
+    if args.output == "-":
+        sys.stdout.write(config)
+        return
+
+    output = args.output or os.path.join(BASE_DIR, "model_repository", profile["name"], "config.pbtxt")
+    if args.check:
+        existing = open(output, encoding="utf-8").read() if os.path.exists(output) else None
+        if existing != config:
+            sys.exit(f"{output} is out of date, run: python generate_config.py {args.profile}")
+        print(f"{output} is up to date")
+        return
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(config)
+    print(f"Written {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+gRPC-часть заглушки Triton: сервис GRPCInferenceService из протокола KServe v2
+(описания сообщений берутся из пакета tritonclient[grpc]).
+Поддерживает raw_input_contents и типизированные contents, unary ModelInfer
+и потоковый ModelStreamInfer (запросы потока обрабатываются параллельно).
+"""
+import asyncio
+
+import grpc
+import numpy as np
+from tritonclient.grpc import service_pb2, service_pb2_grpc
+
+from model import DATATYPES, BadRequest, MockModel
+
+# Поле contents для каждого типа при передаче без raw_input_contents
+CONTENTS_FIELDS = {
+    "BOOL": "bool_contents",
+    "UINT8": "uint_contents",
+    "INT8": "int_contents",
+    "INT16": "int_contents",
+    "INT32": "int_contents",
+    "INT64": "int64_contents",
+    "FP32": "fp32_contents",
+    "FP64": "fp64_contents",
+}
+
+
+class InjectedFailure(Exception):
+    pass
+
+
+def parse_request(request) -> dict:
+    """
+    Разбирает ModelInferRequest в {имя входа: массив}
+    """
+    tensors = {}
+    for i, spec in enumerate(request.inputs):
+        dtype = DATATYPES.get(spec.datatype)
+        if dtype is None:
+            raise BadRequest(f"Unsupported datatype {spec.datatype}")
+        if request.raw_input_contents:
+            if i >= len(request.raw_input_contents):
+                raise BadRequest(f"Raw contents for input {spec.name} are missing")
+            array = np.frombuffer(request.raw_input_contents[i], dtype=dtype)
+        else:
+            array = np.asarray(getattr(spec.contents, CONTENTS_FIELDS.get(spec.datatype, "fp32_contents")), dtype=dtype)
+        shape = list(spec.shape)
+        if array.size != int(np.prod(shape)):
+            raise BadRequest(f"Input {spec.name} size does not match shape {shape}")
+        tensors[spec.name] = array.reshape(shape)
+    return tensors
+
+
+class MockInferenceService(service_pb2_grpc.GRPCInferenceServiceServicer):
+    def __init__(self, model: MockModel):
+        self.model = model
+
+    async def _check_model(self, name: str, context):
+        if name != self.model.name:
+            await context.abort(grpc.StatusCode.NOT_FOUND, f"Request for unknown model: '{name}'")
+
+    async def ServerLive(self, request, context):
+        return service_pb2.ServerLiveResponse(live=True)
+
+    async def ServerReady(self, request, context):
+        return service_pb2.ServerReadyResponse(ready=True)
+
+    async def ModelReady(self, request, context):
+        return service_pb2.ModelReadyResponse(ready=request.name == self.model.name)
+
+    async def ServerMetadata(self, request, context):
+        return service_pb2.ServerMetadataResponse(name="triton-mock", version="2.0.0")
+
+    async def ModelMetadata(self, request, context):
+        await self._check_model(request.name, context)
+        metadata = self.model.metadata()
+        return service_pb2.ModelMetadataResponse(
+            name=metadata["name"],
+            versions=metadata["versions"],
+            platform=metadata["platform"],
+            inputs=[service_pb2.ModelMetadataResponse.TensorMetadata(**spec) for spec in metadata["inputs"]],
+            outputs=[service_pb2.ModelMetadataResponse.TensorMetadata(**spec) for spec in metadata["outputs"]],
+        )
+
+    async def _infer(self, request):
+        model = self.model
+        model.stats["requests"] += 1
+        try:
+            if request.model_name != model.name:
+                raise BadRequest(f"Request for unknown model: '{request.model_name}'")
+            batch = model.check_batch(parse_request(request).get(model.input_name))
+        except BadRequest:
+            model.stats["errors"] += 1
+            raise
+        if model.inject_failure():
+            raise InjectedFailure("Injected failure")
+
+        output = await model.infer(batch)
+        return service_pb2.ModelInferResponse(
+            model_name=model.name,
+            model_version="1",
+            id=request.id,
+            outputs=[service_pb2.ModelInferResponse.InferOutputTensor(
+                name=model.output_name, datatype="FP32", shape=list(output.shape)
+            )],
+            raw_output_contents=[output.tobytes()],
+        )
+
+    async def ModelInfer(self, request, context):
+        try:
+            return await self._infer(request)
+        except BadRequest as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        except InjectedFailure as e:
+            await context.abort(grpc.StatusCode.INTERNAL, str(e))
+
+    async def ModelStreamInfer(self, request_iterator, context):
+        responses = asyncio.Queue()
+
+        async def handle(request):
+            try:
+                response = service_pb2.ModelStreamInferResponse(infer_response=await self._infer(request))
+            except (BadRequest, InjectedFailure) as e:
+                response = service_pb2.ModelStreamInferResponse(
+                    error_message=str(e), infer_response=service_pb2.ModelInferResponse(id=request.id)
+                )
+            await responses.put(response)
+
+        async def read():
+            tasks = set()
+            async for request in request_iterator:
+                task = asyncio.create_task(handle(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+            await responses.put(None)
+
+        reader = asyncio.create_task(read())
+        try:
+            while (response := await responses.get()) is not None:
+                yield response
+        finally:
+            reader.cancel()
+
+
+async def start_grpc_server(model: MockModel, host: str, port: int) -> grpc.aio.Server:
+    server = grpc.aio.server(options=[
+        ("grpc.max_receive_message_length", -1),
+        ("grpc.max_send_message_length", -1),
+    ])
+    service_pb2_grpc.add_GRPCInferenceServiceServicer_to_server(MockInferenceService(model), server)
+    server.add_insecure_port(f"{host}:{port}")
+    await server.start()
+    return server
@@ -0,0 +1,121 @@
+"""
+Общая часть заглушки Triton: имитация модели defect_detection_model
+(задержка, ошибки, детерминированные выходы), используемая HTTP- и gRPC-серверами.
+"""
+import asyncio
+import hashlib
+import random
+
+import numpy as np
+
+DATATYPES = {
+    "BOOL": np.bool_,
+    "UINT8": np.uint8,
+    "INT8": np.int8,
+    "INT16": np.int16,
+    "INT32": np.int32,
+    "INT64": np.int64,
+    "FP16": np.float16,
+    "FP32": np.float32,
+    "FP64": np.float64,
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+class LatencyModel:
+    """
+    Распределение задержки инференса в миллисекундах:
+    - const:MS
+    - uniform:LOW,HIGH
+    - normal:MEAN,STD
+    - lognormal:MEDIAN,SIGMA
+    """
+
+    def __init__(self, spec: str, rng: random.Random):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(value) for value in params.split(",")] if params else []
+        self.rng = rng
+        expected = {"const": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+    def sample(self) -> float:
+        if self.kind == "const":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = self.rng.uniform(*self.params)
+        elif self.kind == "normal":
+            value = self.rng.gauss(*self.params)
+        else:
+            median, sigma = self.params
+            value = median * self.rng.lognormvariate(0, sigma)
+        return max(value, 0.0)
+
+
+class MockModel:
+    def __init__(self, args):
+        self.name = args.model
+        self.input_name = args.input_name
+        self.output_name = args.output_name
+        self.input_shape = [3, args.input_size, args.input_size]
+        self.classes = args.classes
+        self.max_batch_size = args.max_batch_size
+        self.seed = args.seed
+        self.error_rate = args.error_rate
+        self.per_item_ms = args.per_item_ms
+        self.rng = random.Random(args.seed)
+        self.latency = LatencyModel(args.latency, self.rng)
+        # Число экземпляров модели: запросы сверх него ждут в очереди, как на GPU
+        self.instances = asyncio.Semaphore(args.instances)
+        self.stats = {"requests": 0, "items": 0, "errors": 0, "injected_errors": 0, "busy_ms": 0.0}
+
+    def metadata(self) -> dict:
+        return {
+            "name": self.name,
+            "versions": ["1"],
+            "platform": "pytorch_libtorch",
+            "inputs": [{"name": self.input_name, "datatype": "FP32", "shape": [-1] + self.input_shape}],
+            "outputs": [{"name": self.output_name, "datatype": "FP32", "shape": [-1, self.classes]}],
+        }
+
+    def logits(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Детерминированные логиты [N, classes]: генератор для каждого изображения
+        инициализируется хэшем его байтов и seed. Хэшируется каждый 64-й элемент,
+        чтобы заглушка не тратила на хэширование больше CPU, чем тестируемый сервис
+        """
+        result = np.empty((len(batch), self.classes), dtype=np.float32)
+        for i, item in enumerate(batch):
+            digest = hashlib.blake2b(np.ascontiguousarray(item.ravel()[::64]).tobytes(), digest_size=8,
+                                     key=str(self.seed).encode()).digest()
+            rng = np.random.default_rng(int.from_bytes(digest, "little"))
+            # Смещение вниз: большинство классов дефектов не срабатывает
+            result[i] = rng.normal(-4.0, 2.0, self.classes)
+        return result
+
+    def check_batch(self, batch) -> np.ndarray:
+        if batch is None:
+            raise BadRequest(f"Expected input {self.input_name}")
+        if list(batch.shape[1:]) != self.input_shape:
+            raise BadRequest(f"Unexpected shape {list(batch.shape)}, expected [-1] + {self.input_shape}")
+        if len(batch) > self.max_batch_size:
+            raise BadRequest(f"Batch size {len(batch)} exceeds max_batch_size {self.max_batch_size}")
+        return batch
+
+    def inject_failure(self) -> bool:
+        if self.rng.random() < self.error_rate:
+            self.stats["injected_errors"] += 1
+            return True
+        return False
+
+    async def infer(self, batch: np.ndarray) -> np.ndarray:
+        self.stats["items"] += len(batch)
+        delay_ms = self.latency.sample() + self.per_item_ms * len(batch)
+        async with self.instances:
+            await asyncio.sleep(delay_ms / 1000)
+        self.stats["busy_ms"] += delay_ms
+        return self.logits(batch)
@@ -0,0 +1,215 @@
+"""
+Заглушка Triton Inference Server (протокол KServe v2) для нагрузочных тестов без GPU.
+
+Реализует:
+- GET  /v2/health/live, /v2/health/ready
+- GET  /v2, /v2/models/{model}, /v2/models/{model}/ready
+- POST /v2/models/{model}/infer (JSON и расширение binary-data)
+- GET  /v2/mock/stats — счётчики запросов заглушки
+- gRPC GRPCInferenceService (ModelInfer, ModelStreamInfer, health и метаданные)
+  на --grpc-port, см. grpc_service.py
+
+Выход модели детерминирован: логиты для каждого изображения батча вычисляются
+из хэша его байтов, поэтому одинаковые запросы дают одинаковые ответы.
+
+Запуск:
+    python server.py --port 8000 --latency lognormal:20,0.3 --per-item-ms 2 --error-rate 0.01
+Все параметры можно задать и переменными окружения MOCK_* (см. parse_args).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+import numpy as np
+from aiohttp import web
+
+from model import DATATYPES, BadRequest, LatencyModel, MockModel
+
+HEADER_CONTENT_LENGTH = "Inference-Header-Content-Length"
+
+
+def parse_request(body: bytes, header_length) -> tuple:
+    """
+    Разбирает тело запроса KServe v2. Возвращает (JSON-заголовок, {имя входа: массив})
+    """
+    json_length = int(header_length) if header_length else len(body)
+    try:
+        request = json.loads(body[:json_length])
+    except ValueError:
+        raise BadRequest("Request body is not valid JSON")
+
+    tensors = {}
+    offset = json_length
+    for spec in request.get("inputs", []):
+        try:
+            name, shape, datatype = spec["name"], spec["shape"], spec["datatype"]
+        except KeyError as e:
+            raise BadRequest(f"Input is missing field {e}")
+        dtype = DATATYPES.get(datatype)
+        if dtype is None:
+            raise BadRequest(f"Unsupported datatype {datatype}")
+
+        size = spec.get("parameters", {}).get("binary_data_size")
+        if size is not None:
+            if offset + size > len(body):
+                raise BadRequest(f"Binary data for input {name} is truncated")
+            array = np.frombuffer(body, dtype=dtype, count=size // np.dtype(dtype).itemsize, offset=offset)
+            offset += size
+        elif "data" in spec:
+            array = np.asarray(spec["data"], dtype=dtype)
+        else:
+            raise BadRequest(f"Input {name} has no data")
+
+        if array.size != int(np.prod(shape)):
+            raise BadRequest(f"Input {name} size does not match shape {shape}")
+        tensors[name] = array.reshape(shape)
+    return request, tensors
+
+
+def wants_binary(request: dict, output_name: str) -> bool:
+    for output in request.get("outputs", []):
+        if output.get("name") == output_name and "binary_data" in output.get("parameters", {}):
+            return bool(output["parameters"]["binary_data"])
+    return bool(request.get("parameters", {}).get("binary_data_output", False))
+
+
+def build_response(model: MockModel, request: dict, output: np.ndarray) -> web.Response:
+    spec = {"name": model.output_name, "datatype": "FP32", "shape": list(output.shape)}
+    result = {"model_name": model.name, "model_version": "1", "outputs": [spec]}
+    if "id" in request:
+        result["id"] = request["id"]
+
+    if not wants_binary(request, model.output_name):
+        spec["data"] = output.ravel().tolist()
+        return web.json_response(result)
+
+    raw = output.tobytes()
+    spec["parameters"] = {"binary_data_size": len(raw)}
+    header = json.dumps(result).encode()
+    return web.Response(
+        body=header + raw,
+        content_type="application/octet-stream",
+        headers={HEADER_CONTENT_LENGTH: str(len(header))},
+    )
+
+
+def error(status: int, message: str) -> web.Response:
+    return web.json_response({"error": message}, status=status)
+
+
+def create_app(args, model: MockModel = None) -> web.Application:
+    model = model or MockModel(args)
+    routes = web.RouteTableDef()
+
+    def check_model(request: web.Request):
+        if request.match_info["model"] != model.name:
+            raise web.HTTPNotFound(
+                text=json.dumps({"error": f"Request for unknown model: '{request.match_info['model']}'"}),
+                content_type="application/json",
+            )
+
+    @routes.get("/v2/health/live")
+    @routes.get("/v2/health/ready")
+    async def health(request):
+        return web.Response(status=200)
+
+    @routes.get("/v2")
+    async def server_metadata(request):
+        return web.json_response({"name": "triton-mock", "version": "2.0.0", "extensions": ["binary_tensor_data"]})
+
+    @routes.get("/v2/models/{model}")
+    async def model_metadata(request):
+        check_model(request)
+        return web.json_response(model.metadata())
+
+    @routes.get("/v2/models/{model}/ready")
+    async def model_ready(request):
+        check_model(request)
+        return web.Response(status=200)
+
+    @routes.get("/v2/mock/stats")
+    async def stats(request):
+        return web.json_response(model.stats)
+
+    @routes.post("/v2/models/{model}/infer")
+    async def infer(request):
+        check_model(request)
+        model.stats["requests"] += 1
+        body = await request.read()
+        try:
+            payload, tensors = parse_request(body, request.headers.get(HEADER_CONTENT_LENGTH))
+            batch = model.check_batch(tensors.get(model.input_name))
+        except BadRequest as e:
+            model.stats["errors"] += 1
+            return error(400, str(e))
+
+        if model.inject_failure():
+            return error(500, "Injected failure")
+
+        output = await model.infer(batch)
+        return build_response(model, payload, output)
+
+    app = web.Application(client_max_size=args.max_request_size)
+    app.add_routes(routes)
+    return app
+
+
+def parse_args(argv=None):
+    env = os.getenv
+    parser = argparse.ArgumentParser(description="KServe v2 mock of triton_inference_server")
+    parser.add_argument("--host", default=env("MOCK_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(env("MOCK_PORT", "8000")))
+    parser.add_argument("--grpc-port", type=int, default=int(env("MOCK_GRPC_PORT", "0")),
+                        help="Порт gRPC (0 — выключен, требует пакет tritonclient[grpc])")
+    parser.add_argument("--model", default=env("MOCK_MODEL", "defect_detection_model"))
+    parser.add_argument("--input-name", default=env("MOCK_INPUT_NAME", "input__0"))
+    parser.add_argument("--output-name", default=env("MOCK_OUTPUT_NAME", "output__0"))
+    parser.add_argument("--input-size", type=int, default=int(env("MOCK_INPUT_SIZE", "500")))
+    parser.add_argument("--classes", type=int, default=int(env("MOCK_CLASSES", "7")))
+    parser.add_argument("--max-batch-size", type=int, default=int(env("MOCK_MAX_BATCH_SIZE", "16")))
+    parser.add_argument("--latency", default=env("MOCK_LATENCY", "const:10"),
+                        help="const:MS | uniform:LOW,HIGH | normal:MEAN,STD | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--per-item-ms", type=float, default=float(env("MOCK_PER_ITEM_MS", "0")),
+                        help="Дополнительная задержка на каждое изображение батча")
+    parser.add_argument("--instances", type=int, default=int(env("MOCK_INSTANCES", "1")),
+                        help="Число параллельно исполняемых запросов (экземпляров модели)")
+    parser.add_argument("--error-rate", type=float, default=float(env("MOCK_ERROR_RATE", "0")),
+                        help="Доля запросов, на которые отвечать 500")
+    parser.add_argument("--seed", type=int, default=int(env("MOCK_SEED", "0")))
+    parser.add_argument("--max-request-size", type=int,
+                        default=int(env("MOCK_MAX_REQUEST_SIZE", str(256 * 1024 * 1024))))
+    args = parser.parse_args(argv)
+    LatencyModel(args.latency, random.Random())  # Проверяем спецификацию задержки до запуска
+    return args
+
+
+async def serve(args):
+    model = MockModel(args)
+    runner = web.AppRunner(create_app(args, model))
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+
+    grpc_server = None
+    if args.grpc_port:
+        # gRPC нужен только по запросу, поэтому импортируем его здесь
+        from grpc_service import start_grpc_server
+        grpc_server = await start_grpc_server(model, args.host, args.grpc_port)
+
+    print(f"Triton mock: model={args.model} http={args.port} grpc={args.grpc_port or '-'} "
+          f"latency={args.latency} error_rate={args.error_rate} started at {time.strftime('%H:%M:%S')}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        if grpc_server is not None:
+            await grpc_server.stop(None)
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
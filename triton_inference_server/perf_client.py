@@ -0,0 +1,186 @@
+"""
+Нагрузочный клиент в духе perf_analyzer: перебор уровней конкурентности,
+замер окнами до стабилизации пропускной способности, перцентили задержки.
+Нужен там, где нет образа с perf_analyzer (например, против заглушки mock/server.py).
+
+Запуск из папки triton_inference_server:
+    python mock/server.py --port 8010 --grpc-port 8011 --latency const:15 --per-item-ms 1 &
+    python perf_client.py -u localhost:8010 -b 8 --concurrency-range 1:8:2
+    python perf_client.py -u localhost:8011 -i grpc -b 1 --concurrency-range 1:16:4 -f results.csv
+На машине с GPU то же самое с настоящим perf_analyzer:
+    perf_analyzer -m defect_detection_model -u localhost:8001 -i grpc -b 8 --concurrency-range 1:8:2
+"""
+import argparse
+import asyncio
+import csv
+import json
+import time
+
+import numpy as np
+
+HEADER_CONTENT_LENGTH = "Inference-Header-Content-Length"
+
+
+class HttpInfer:
+    """
+    Запросы KServe v2 по HTTP с тензором в бинарном виде (расширение binary-data)
+    """
+
+    def __init__(self, url: str, model: str, input_name: str, batch: np.ndarray):
+        import aiohttp
+
+        raw = batch.tobytes()
+        header = json.dumps({
+            "inputs": [{"name": input_name, "shape": list(batch.shape), "datatype": "FP32",
+                        "parameters": {"binary_data_size": len(raw)}}],
+            "parameters": {"binary_data_output": True},
+        }).encode()
+        self._body = header + raw
+        self._headers = {"Content-Type": "application/octet-stream", HEADER_CONTENT_LENGTH: str(len(header))}
+        self._url = f"http://{url}/v2/models/{model}/infer"
+        self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0))
+
+    async def infer(self) -> bool:
+        async with self._session.post(self._url, data=self._body, headers=self._headers) as response:
+            await response.read()
+            return response.status == 200
+
+    async def close(self):
+        await self._session.close()
+
+
+class GrpcInfer:
+    """
+    Unary-запросы ModelInfer по gRPC с тензором в raw_input_contents
+    """
+
+    def __init__(self, url: str, model: str, input_name: str, batch: np.ndarray):
+        import grpc
+        from tritonclient.grpc import service_pb2, service_pb2_grpc
+
+        self._error = grpc.aio.AioRpcError
+        self._channel = grpc.aio.insecure_channel(url, options=[
+            ("grpc.max_send_message_length", -1),
+            ("grpc.max_receive_message_length", -1),
+        ])
+        self._stub = service_pb2_grpc.GRPCInferenceServiceStub(self._channel)
+        self._request = service_pb2.ModelInferRequest(
+            model_name=model,
+            inputs=[service_pb2.ModelInferRequest.InferInputTensor(
+                name=input_name, datatype="FP32", shape=list(batch.shape)
+            )],
+            raw_input_contents=[batch.tobytes()],
+        )
+
+    async def infer(self) -> bool:
+        try:
+            await self._stub.ModelInfer(self._request)
+            return True
+        except self._error:
+            return False
+
+    async def close(self):
+        await self._channel.close()
+
+
+async def run_window(client, concurrency: int, seconds: float) -> tuple:
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            if await client.infer():
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def measure(client, concurrency: int, args) -> dict:
+    """
+    Окна по measurement_interval мс, пока пропускная способность трёх последних
+    окон не разойдётся меньше чем на stability_percentage (как в perf_analyzer)
+    """
+    await run_window(client, concurrency, args.measurement_interval / 1000 / 2)  # Прогрев
+    windows = []
+    stable = False
+    for _ in range(args.max_trials):
+        windows.append(await run_window(client, concurrency, args.measurement_interval / 1000))
+        if len(windows) >= 3:
+            rates = [len(latencies) / elapsed for latencies, _, elapsed in windows[-3:]]
+            if max(rates) - min(rates) <= max(rates) * args.stability_percentage / 100:
+                stable = True
+                break
+    windows = windows[-3:]
+    latencies = np.array([value for window in windows for value in window[0]]) * 1e6
+    requests = len(latencies)
+    elapsed = sum(window[2] for window in windows)
+    percentiles = np.percentile(latencies, [50, 90, 95, 99]) if requests else [float("nan")] * 4
+    return {
+        "concurrency": concurrency,
+        "throughput": requests * args.batch_size / elapsed,
+        "avg_us": float(latencies.mean()) if requests else float("nan"),
+        "p50_us": percentiles[0],
+        "p90_us": percentiles[1],
+        "p95_us": percentiles[2],
+        "p99_us": percentiles[3],
+        "errors": sum(window[1] for window in windows),
+        "stable": stable,
+    }
+
+
+def concurrency_levels(spec: str) -> list:
+    parts = [int(value) for value in spec.split(":")]
+    start = parts[0]
+    end = parts[1] if len(parts) > 1 else start
+    step = parts[2] if len(parts) > 2 else 1
+    return list(range(start, end + 1, step))
+
+
+async def main(args):
+    batch = np.random.default_rng(0).standard_normal(
+        (args.batch_size, 3, args.input_size, args.input_size), dtype=np.float32
+    )
+    client_class = GrpcInfer if args.protocol == "grpc" else HttpInfer
+    client = client_class(args.url, args.model_name, args.input_name, batch)
+
+    print(f"*** Measurement Settings ***\n  Batch size: {args.batch_size}\n  Protocol: {args.protocol}\n"
+          f"  Measurement window: {args.measurement_interval} msec\n")
+    results = []
+    try:
+        for concurrency in concurrency_levels(args.concurrency_range):
+            result = await measure(client, concurrency, args)
+            results.append(result)
+            print(f"Concurrency: {concurrency}, throughput: {result['throughput']:.1f} infer/sec, "
+                  f"latency {result['avg_us']:.0f} usec (p50 {result['p50_us']:.0f}, p90 {result['p90_us']:.0f}, "
+                  f"p95 {result['p95_us']:.0f}, p99 {result['p99_us']:.0f}), errors {result['errors']}"
+                  + ("" if result["stable"] else " [unstable]"))
+    finally:
+        await client.close()
+
+    if args.latency_report_file:
+        with open(args.latency_report_file, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+            writer.writeheader()
+            writer.writerows(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--model-name", default="defect_detection_model")
+    parser.add_argument("-u", "--url", default="localhost:8000", help="host:port сервера")
+    parser.add_argument("-i", "--protocol", choices=("http", "grpc"), default="http")
+    parser.add_argument("-b", "--batch-size", type=int, default=1)
+    parser.add_argument("--concurrency-range", default="1:4:1", help="start:end:step")
+    parser.add_argument("-p", "--measurement-interval", type=int, default=5000, help="Длина окна, мс")
+    parser.add_argument("-s", "--stability-percentage", type=float, default=10)
+    parser.add_argument("-r", "--max-trials", type=int, default=10)
+    parser.add_argument("-f", "--latency-report-file", help="CSV с результатами")
+    parser.add_argument("--input-name", default="input__0")
+    parser.add_argument("--input-size", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
@@ -12,6 +12,9 @@ load_dotenv()
 TOKEN = os.getenv("TOKEN")
 DIR_DETECT = os.getenv("DIR_DETECT", "dir_detect")
 DIR_MARKUP = os.getenv("DIR_MARKUP", "dir_markup")
+# Раскладка DIR_DETECT по подпапкам из префикса имени файла (как в сервисе web)
+STORAGE_SHARD_DEPTH = int(os.getenv("STORAGE_SHARD_DEPTH", "2"))
+STORAGE_SHARD_WIDTH = int(os.getenv("STORAGE_SHARD_WIDTH", "2"))
 
 # Убеждаемся, что папки существуют
 os.makedirs(DIR_DETECT, exist_ok=True)
@@ -22,13 +25,40 @@ bot = Bot(token=TOKEN)
 dp = Dispatcher()
 
 
+def iter_photos(folder, depth):
+    """Обходит папку и её подпапки-шарды, выдавая имена фото по порядку"""
+    with os.scandir(folder) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+    for entry in entries:
+        if entry.is_dir() and depth > 0:
+            yield from iter_photos(entry.path, depth - 1)
+        elif entry.is_file() and entry.name.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp')):  # Проверяем расширение
+            yield entry.name
+
+
+def photo_path(filename):
+    """Путь к фото в DIR_DETECT: сначала в подпапке-шарде, затем в корне (старые файлы)"""
+    shards = [filename[i * STORAGE_SHARD_WIDTH:(i + 1) * STORAGE_SHARD_WIDTH] for i in range(STORAGE_SHARD_DEPTH)]
+    sharded_path = os.path.join(DIR_DETECT, *shards, filename)
+    if os.path.exists(sharded_path):
+        return sharded_path
+    return os.path.join(DIR_DETECT, filename)
+
+
+def prune_shard_dirs(path):
+    """Удаляет опустевшие подпапки-шарды, чтобы обход DIR_DETECT оставался быстрым"""
+    folder = os.path.dirname(path)
+    while os.path.abspath(folder) != os.path.abspath(DIR_DETECT):
+        try:
+            os.rmdir(folder)
+        except OSError:
+            break  # Папка не пуста (или уже удалена)
+        folder = os.path.dirname(folder)
+
+
 async def get_next_photo():
     """Возвращает первый файл из папки DIR_DETECT или None, если файлов нет"""
-    files = sorted(os.listdir(DIR_DETECT))  # Получаем список файлов
-    for file in files:
-        if file.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp')):  # Проверяем расширение
-            return file
-    return None
+    return next(iter_photos(DIR_DETECT, STORAGE_SHARD_DEPTH), None)
 
 
 @dp.message(Command("start"))
@@ -41,7 +71,7 @@ async def start_validation(message: types.Message):
         await message.answer("Нет новых фото для проверки.")
         return
 
-    filepath = os.path.join(DIR_DETECT, filename)
+    filepath = photo_path(filename)
 
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="✅ Оставить", callback_data=f"approve|{filename}")],
@@ -56,11 +86,12 @@ async def start_validation(message: types.Message):
 async def approve_photo(callback: types.CallbackQuery):
     """Перемещает фото в папку DIR_MARKUP"""
     filename = callback.data.split("|")[1]
-    src_path = os.path.join(DIR_DETECT, filename)
+    src_path = photo_path(filename)
     dst_path = os.path.join(DIR_MARKUP, filename)
 
     if os.path.exists(src_path):
         shutil.move(src_path, dst_path)
+        prune_shard_dirs(src_path)
         await callback.message.answer(f"✅ Файл {filename} сохранён.")
     else:
         await callback.message.answer("⚠ Файл уже обработан.")
@@ -73,10 +104,11 @@ async def approve_photo(callback: types.CallbackQuery):
 async def reject_photo(callback: types.CallbackQuery):
     """Удаляет фото"""
     filename = callback.data.split("|")[1]
-    file_path = os.path.join(DIR_DETECT, filename)
+    file_path = photo_path(filename)
 
     if os.path.exists(file_path):
         os.remove(file_path)
+        prune_shard_dirs(file_path)
         await callback.message.answer(f"❌ Файл {filename} удалён.")
     else:
         await callback.message.answer("⚠ Файл уже обработан.")
@@ -1,20 +1,29 @@
 import os
-import uuid
-import aiofiles
-import aiohttp
+import base64
+import binascii
 import numpy as np
 from fastapi import HTTPException, UploadFile, Form, Depends
+from fastapi.responses import ORJSONResponse, JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from Models.Print import Print, PrintSchema
+from Models.Print import Print
 from database import get_db
-from torchvision import transforms
-from PIL import Image
+from Services.InferenceBackend import InferenceBackend
+from Services.InferenceBatcher import InferenceBatcher
+from Services.PreprocessPool import PreprocessPool
+from Services.ResultCache import ResultCache
+from Services.UploadStream import UploadStream
+from Services.Storage import get_storage
+from Services.Serialization import select_columns, rows_to_dicts, row_builder, ok_response
+from Services.JobQueue import JobQueue
+from Services.Thresholds import Thresholds
+from config import JOB_MAX_WAIT, JOB_POLL_INTERVAL
 import asyncio
-import io
+import time
+from typing import List, Optional
 
-TRITON_URL = "http://triton_inference_server:8000/v2/models/defect_detection_model/infer"
-THRESHOLDS = np.array([0.00765891, 0.08482563, 0.04003922, 0.12988287, 0.01532748, 0.07293494, 0.01747844])
+# Поля, которые можно запросить через параметр fields в /api/prints/
+PRINT_FIELDS = ('id', 'printer_id', 'defect', 'img_path', 'quality')
+MAX_PAGE_SIZE = 1000
 
 class PrintController:
     # Разрешённые расширения файлов изображений
@@ -28,15 +37,69 @@ class PrintController:
         return '.' in filename and filename.rsplit('.', 1)[1].lower() in PrintController.ALLOWED_EXTENSIONS
 
     @staticmethod
-    async def get_prints(session: AsyncSession):
+    def encode_cursor(last_id: int) -> str:
+        return base64.urlsafe_b64encode(str(last_id).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> int:
+        try:
+            return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    @staticmethod
+    async def get_prints(
+            session: AsyncSession,
+            cursor: Optional[str] = None,
+            limit: int = 100,
+            printer_id: Optional[int] = None,
+            quality: Optional[int] = None,
+            defect: Optional[int] = None,
+            fields: Optional[str] = None
+    ):
         """
-        Получает список всех записей о печати из базы данных
+        Получает страницу записей о печати (keyset-пагинация по id):
+        - cursor — токен next_cursor из предыдущего ответа
+        - printer_id, quality, defect — фильтры (defect — номер класса дефекта)
+        - fields — список возвращаемых полей через запятую
         """
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail=f"Limit must be in range 1-{MAX_PAGE_SIZE}")
+
+        selected_fields = list(PRINT_FIELDS)
+        if fields:
+            requested = [field.strip() for field in fields.split(",") if field.strip()]
+            unknown = set(requested) - set(PRINT_FIELDS)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+            # id нужен всегда — по нему строится курсор
+            selected_fields = ['id'] + [field for field in requested if field != 'id']
+
+        query = select_columns(Print, selected_fields)
+        if cursor:
+            query = query.where(Print.id > PrintController.decode_cursor(cursor))
+        if printer_id is not None:
+            query = query.where(Print.printer_id == printer_id)
+        if quality is not None:
+            query = query.where(Print.quality == quality)
+        if defect is not None:
+            # Оператор @> использует GIN-индекс по defect
+            query = query.where(Print.defect.contains([defect]))
+        # Берём на одну запись больше, чтобы понять, есть ли следующая страница
+        query = query.order_by(Print.id).limit(limit + 1)
+
         try:
-            result = await session.execute(select(Print))
-            prints = result.scalars().all()
-            print_schema = PrintSchema(many=True)
-            return {"message": "OK", "data": print_schema.dump(prints)}
+            result = await session.execute(query)
+            rows = result.all()
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = PrintController.encode_cursor(rows[-1].id)
+            return ORJSONResponse({
+                "message": "OK",
+                "data": rows_to_dicts(selected_fields, rows),
+                "next_cursor": next_cursor
+            })
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -46,28 +109,30 @@ class PrintController:
         Получает конкретную запись о печати по её ID
         """
         try:
-            result = await session.execute(select(Print).filter(Print.id == item_id))
-            selected_print = result.scalar_one_or_none()
-            if not selected_print:
-                raise HTTPException(status_code=404, detail="Print not found")
-            print_schema = PrintSchema()
-            return {"message": "OK", "data": print_schema.dump(selected_print)}
+            result = await session.execute(select_columns(Print, PRINT_FIELDS).filter(Print.id == item_id))
+            selected_print = result.one_or_none()
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
+        if not selected_print:
+            raise HTTPException(status_code=404, detail="Print not found")
+        return ok_response(row_builder(PRINT_FIELDS)(selected_print))
+
     @staticmethod
     async def add_print(
             img: UploadFile,
             printer_id: int = Form(...),
             quality: int = Form(...),
             session: AsyncSession = Depends(get_db),
-            upload_folder: str = "/uploads"  # Папка для загрузки изображений
+            upload_folder: str = "/uploads",  # Папка для загрузки изображений
+            async_mode: bool = False  # Вернуть 202 с id задания вместо ожидания результата
     ):
         """
         Добавляет новую запись о печати:
         - Сохраняет изображение в файловой системе
         - Отправляет его на обработку в сервис определения дефектов
         - Создаёт запись в базе данных
+        В асинхронном режиме ставит задание в очередь и сразу возвращает его id
         """
         # Проверяем, что файл загружен и имеет допустимый формат
         if not img or img.filename == "":
@@ -76,66 +141,31 @@ class PrintController:
         if not PrintController.allowed_file(img.filename):
             raise HTTPException(status_code=400, detail="Invalid img type")
 
-        # Безопасное имя файла
-        filename = PrintController.secure_filename(img.filename)
-        filepath = os.path.join(upload_folder, filename)
+        saved_path = None  # Путь к файлу, записанному в рамках этого запроса
 
         try:
-            # Генерация уникального имени файла, если такое уже существует
-            while os.path.exists(filepath):
-                name, ext = filename.rsplit('.', 1)
-                unique_id = str(uuid.uuid4())
-                filename = f"{name}_{unique_id}.{ext}"
-                filepath = os.path.join(upload_folder, filename)
-
-            # Асинхронное сохранение файла на диск
-            async with aiofiles.open(filepath, 'wb') as f:
-                content = await img.read()
-                await f.write(content)
-
-            # Преобразование изображения
-            transform = transforms.Compose([
-                transforms.Resize((500, 500)),
-                transforms.ToTensor(),
-                transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-            ])
-
-            image_bytes = io.BytesIO(content)
-            image = Image.open(image_bytes).convert("RGB")
-            image = transform(image).unsqueeze(0)  # Преобразование изображения
-            image_data = image.numpy().flatten().tolist()
-
-            data = {
-                "inputs": [{
-                    "name": "input__0",
-                    "shape": [1, 3, 500, 500],
-                    "datatype": "FP32",
-                    "data": image_data
-                }]
-            }
+            filepath, cache_key, cached_probabilities, saved_path = await PrintController.save_upload(img, upload_folder)
+
+            if async_mode:
+                return await PrintController.enqueue_print(
+                    session, printer_id, quality, filepath, cache_key, cached_probabilities
+                )
 
-            # Асинхронный запрос к Triton
-            async with aiohttp.ClientSession() as session_aiohttp:
-                async with session_aiohttp.post(TRITON_URL, json=data) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        output_data = result['outputs'][0]['data']
-                        probabilities = 1 / (1 + np.exp(-np.array(output_data)))
-                        detected_classes = [i for i, prob in enumerate(probabilities) if prob > THRESHOLDS[i]]
-                        is_defected_image = np.array(detected_classes)
-                    else:
-                        is_defected_image = np.array([])
+            detected_classes = await PrintController.detect_defects(
+                filepath, cache_key, printer_id, quality, cached_probabilities
+            )
+            if detected_classes is None:
+                # Бэкенд инференса ответил ошибкой
+                detected_classes = []
+
+            is_defected_image = np.array(detected_classes)
 
             print(f"Ответ от triton_inference_server : {is_defected_image}")
 
             # Создание записи в базе данных
-            new_print = Print(
-                printer_id=printer_id,
-                defect=is_defected_image.tolist(),
-                img_path=filepath,
-                quality=quality
+            new_print = await PrintController.create_print(
+                session, printer_id, quality, filepath, is_defected_image.tolist()
             )
-            session.add(new_print)
             await session.commit()
 
             return {
@@ -152,19 +182,165 @@ class PrintController:
             if session:
                 await session.rollback()
 
-            # Удаление файла в случае ошибки
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            # Файл, созданный этим запросом, за время обработки могли переиспользовать
+            # другие загрузки того же изображения, поэтому удаляем его только без ссылок на него
+            if saved_path:
+                await PrintController.discard_upload(session, saved_path)
 
+            # Ошибки с уже выбранным статусом (например, 429 при переполнении очереди) отдаём как есть
+            if isinstance(e, HTTPException):
+                raise
             raise HTTPException(status_code=500, detail=str(e))
 
     @staticmethod
-    def secure_filename(filename: str) -> str:
+    async def discard_upload(session: AsyncSession, img_path: str, job_id: Optional[str] = None):
+        """
+        Удаляет файл из хранилища, если на него не ссылаются записи о печати
+        и незавершённые задания (кроме job_id)
+        """
+        try:
+            if await JobQueue.upload_unused(session, img_path, job_id) and os.path.exists(img_path):
+                os.remove(img_path)
+        except Exception as e:
+            print(f"Не удалось удалить загрузку {img_path}: {str(e)}")
+
+    @staticmethod
+    async def save_upload(img: UploadFile, upload_folder: str):
+        """
+        Сохраняет загрузку в хранилище. Возвращает кортеж
+        (путь к файлу, ключ кэша, вероятности классов из кэша или None, путь созданного файла или None)
+        """
+        ext = img.filename.rsplit('.', 1)[1].lower()
+        storage = get_storage(upload_folder)
+
+        # Потоковая запись во временный файл с подсчётом SHA-256 и проверкой размера
+        upload = await UploadStream.save(img, upload_folder)
+
+        try:
+            # Повторная загрузка того же изображения: берём результат из кэша
+            cache_key = ResultCache.make_key(upload.sha256)
+            cached = await ResultCache.get(cache_key)
+            # Записи без вероятностей (до появления порогов по принтерам) не используем
+            cached_path = storage.resolve(cached["img_path"]) if cached and "probabilities" in cached else None
+            if cached_path is not None:
+                os.remove(upload.path)
+                return cached_path, cache_key, cached["probabilities"], None
+
+            # Файл переносится в хранилище по хэшу содержимого (атомарно)
+            filepath, created = storage.store(upload.path, upload.sha256, ext)
+            return filepath, cache_key, None, filepath if created else None
+        except Exception:
+            if os.path.exists(upload.path):
+                os.remove(upload.path)
+            raise
+
+    @staticmethod
+    async def detect_defects(filepath: str, cache_key: str, printer_id: int, quality: int,
+                             cached_probabilities: Optional[List[float]] = None) -> Optional[List[int]]:
+        """
+        Распознаёт дефекты на сохранённом изображении с порогами для (printer_id, quality).
+        Вероятности из кэша только сравниваются с текущими порогами.
+        Возвращает None, если бэкенд инференса ответил ошибкой
+        """
+        if cached_probabilities is not None:
+            return Thresholds.apply(np.array([cached_probabilities]), [(printer_id, quality)])[0]
+
+        # Декодирование из файла выполняется в пуле, не блокируя event loop
+        image = await PreprocessPool.run(filepath)
+
+        # Изображение попадает в очередь динамического батчинга и отправляется в бэкенд инференса
+        result = await InferenceBatcher.submit(image, (printer_id, quality))
+        if result is None:
+            return None
+        probabilities, detected_classes = result
+        # Кэшируются вероятности: пороги зависят от принтера и могут меняться
+        await ResultCache.set(cache_key, {"probabilities": probabilities, "img_path": filepath})
+        return detected_classes
+
+    @staticmethod
+    async def create_print(session: AsyncSession, printer_id: int, quality: int,
+                           filepath: str, defect: List[int]) -> Print:
+        """
+        Добавляет запись о печати в текущую транзакцию (коммит — на вызывающей стороне)
+        """
+        new_print = Print(
+            printer_id=printer_id,
+            defect=defect,
+            img_path=filepath,
+            quality=quality
+        )
+        session.add(new_print)
+        await session.flush()
+        return new_print
+
+    @staticmethod
+    async def enqueue_print(session: AsyncSession, printer_id: int, quality: int,
+                            filepath: str, cache_key: str, cached_probabilities: Optional[List[float]]):
         """
-        Преобразует имя файла в безопасный формат:
-        - Заменяет пробелы на подчёркивания
-        - Удаляет все символы, кроме букв, цифр и ._-
+        Ставит задание распознавания в очередь и возвращает 202 с его id.
+        Если результат уже есть в кэше, запись о печати создаётся сразу
         """
-        filename = filename.replace(" ", "_")
-        filename = "".join(c for c in filename if c.isalnum() or c in "._-")
-        return filename
+        job = JobQueue.new_job(printer_id, quality, filepath, cache_key)
+        session.add(job)
+        if cached_probabilities is not None:
+            defects = await PrintController.detect_defects(
+                filepath, cache_key, printer_id, quality, cached_probabilities
+            )
+            new_print = await PrintController.create_print(session, printer_id, quality, filepath, defects)
+            job.status = 'done'
+            job.print_id = new_print.id
+            job.defect = defects
+        await session.commit()
+        JobQueue.wakeup.set()
+
+        return JSONResponse(
+            status_code=202,
+            content={"message": "Print job accepted", "job_id": job.id, "status": job.status},
+            headers={"Location": f"/api/prints/jobs/{job.id}"}
+        )
+
+    @staticmethod
+    async def get_job(session: AsyncSession, job_id: str, wait: float = 0):
+        """
+        Возвращает состояние задания. Если wait > 0, ждёт (long-poll) до завершения
+        задания, но не дольше wait секунд
+        """
+        deadline = time.monotonic() + min(wait, JOB_MAX_WAIT)
+        while True:
+            try:
+                job = await JobQueue.get(session, job_id)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+            if job is None:
+                raise HTTPException(status_code=404, detail="Job not found")
+            if job.status in ('done', 'failed') or time.monotonic() >= deadline:
+                break
+            # Сбрасываем снимок сессии, чтобы следующая итерация прочитала свежие данные
+            await session.rollback()
+            session.expunge_all()
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+        return ok_response({
+            "job_id": job.id,
+            "status": job.status,
+            "print_id": job.print_id,
+            "defect": job.defect,
+            "error": job.error
+        })
+
+    @staticmethod
+    async def infer_batch(batch: np.ndarray, keys: List[Optional[tuple]]) -> List[Optional[tuple]]:
+        """
+        Отправляет батч [N, 3, 500, 500] в бэкенд инференса и возвращает для каждого
+        изображения пару (вероятности классов, обнаруженные классы дефектов).
+        keys — (printer_id, quality) каждого изображения для выбора порогов.
+        None для всех изображений, если бэкенд ответил ошибкой
+        """
+        output_data = await InferenceBackend.infer(batch)
+        if output_data is None:
+            return [None] * len(batch)
+
+        # Сигмоида и сравнение с порогами сразу для всего батча
+        probabilities = 1 / (1 + np.exp(-output_data.reshape(len(batch), -1).astype(np.float32)))
+        detected = Thresholds.apply(probabilities, keys)
+        return list(zip(probabilities.tolist(), detected))
@@ -1,155 +1,59 @@
+import csv
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List, Optional, Dict, Any
-from Models.Printer import Printer, PrinterSchema
-from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Tuple
+from Models.Printer import Printer
+from Services.PrinterCatalog import PrinterCatalog
+from Services.PrinterImport import IMPORT_FIELDS, parse_rows, validate_rows
+from Services.PrinterValidation import PrinterCreate
+from config import BULK_IMPORT_MAX_ROWS
 import logging
 
 
-class PrinterCreate(BaseModel):
-    name: str
-    val_print_x: Optional[float] = None
-    val_print_y: Optional[float] = None
-    val_print_z: Optional[float] = None
-    view_table: Optional[str] = None
-    center_origin: Optional[bool] = None
-    table_heating: Optional[bool] = None
-    print_volume_heating: Optional[bool] = None
-    type_g_code: Optional[str] = None
-    min_x_head: Optional[float] = None
-    min_y_head: Optional[float] = None
-    max_x_head: Optional[float] = None
-    max_y_head: Optional[float] = None
-    height_portal: Optional[float] = None
-    displace_extruder: Optional[bool] = None
-    count_extruder: Optional[int] = None
-    start_g_code: Optional[str] = None
-    end_g_code: Optional[str] = None
-    extr_1_nozzle_diameter: Optional[float] = None
-    extr_1_filament_diameter: Optional[float] = None
-    extr_1_nozzle_displacement_x: Optional[float] = None
-    extr_1_nozzle_displacement_y: Optional[float] = None
-    extr_1_fan_number: Optional[int] = None
-    extr_1_start_g_code: Optional[str] = None
-    extr_1_end_g_code: Optional[str] = None
-    extr_2_nozzle_diameter: Optional[float] = None
-    extr_2_filament_diameter: Optional[float] = None
-    extr_2_nozzle_displacement_x: Optional[float] = None
-    extr_2_nozzle_displacement_y: Optional[float] = None
-    extr_2_fan_number: Optional[int] = None
-    extr_2_start_g_code: Optional[str] = None
-    extr_2_end_g_code: Optional[str] = None
-
-
 class PrinterController:
     @staticmethod
-    async def get_printers(session: AsyncSession):
+    async def get_printers(session: AsyncSession, if_none_match: Optional[str] = None):
         try:
-            result = await session.execute(select(Printer))
-            printers = result.scalars().all()
-            printer_schema = PrinterSchema(many=True)
-            return {"message": "OK", "data": printer_schema.dump(printers)}
+            catalog = await PrinterCatalog.get(session)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
+        return PrinterCatalog.response(catalog.body, catalog.etag, if_none_match)
 
     @staticmethod
-    async def get_printer(session: AsyncSession, item_id: int):
+    async def get_printer(session: AsyncSession, item_id: int, if_none_match: Optional[str] = None):
         try:
-            result = await session.execute(
-                select(Printer).filter(Printer.id == item_id)
-            )
-            printer = result.scalar_one_or_none()
-            if not printer:
-                raise HTTPException(status_code=404, detail="Printer not found")
-
-            printer_schema = PrinterSchema()
-            return {"message": "OK", "data": printer_schema.dump(printer)}
+            catalog = await PrinterCatalog.get(session)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
+        item = catalog.items.get(item_id)
+        if item is None:
+            raise HTTPException(status_code=404, detail="Printer not found")
+        body, etag = item
+        return PrinterCatalog.response(body, etag, if_none_match)
+
     @staticmethod
-    async def add_printer(session: AsyncSession, printer_data: dict):
+    async def add_printer(session: AsyncSession, printer_data: PrinterCreate):
+        """
+        Добавляет принтер. Типы полей уже проверены и приведены моделью PrinterCreate
+        (ошибки валидации FastAPI возвращает как 422)
+        """
         try:
-            # Преобразуем поля в нужные типы
-            printer_dict = printer_data.copy()  # Создаём копию, чтобы не изменять оригинал
-            if printer_dict.get("val_print_x") is not None:
-                printer_dict["val_print_x"] = float(printer_dict["val_print_x"])
-
-            if printer_dict.get("val_print_y") is not None:
-                printer_dict["val_print_y"] = float(printer_dict["val_print_y"])
-
-            if printer_dict.get("val_print_z") is not None:
-                printer_dict["val_print_z"] = float(printer_dict["val_print_z"])
-
-            if printer_dict.get("min_x_head") is not None:
-                printer_dict["min_x_head"] = float(printer_dict["min_x_head"])
-
-            if printer_dict.get("min_y_head") is not None:
-                printer_dict["min_y_head"] = float(printer_dict["min_y_head"])
-
-            if printer_dict.get("max_x_head") is not None:
-                printer_dict["max_x_head"] = float(printer_dict["max_x_head"])
-
-            if printer_dict.get("max_y_head") is not None:
-                printer_dict["max_y_head"] = float(printer_dict["max_y_head"])
-
-            if printer_dict.get("height_portal") is not None:
-                printer_dict["height_portal"] = float(printer_dict["height_portal"])
-
-            if printer_dict.get("extr_1_nozzle_diameter") is not None:
-                printer_dict["extr_1_nozzle_diameter"] = float(printer_dict["extr_1_nozzle_diameter"])
-
-            if printer_dict.get("extr_1_filament_diameter") is not None:
-                printer_dict["extr_1_filament_diameter"] = float(printer_dict["extr_1_filament_diameter"])
-
-            if printer_dict.get("extr_1_nozzle_displacement_x") is not None:
-                printer_dict["extr_1_nozzle_displacement_x"] = float(printer_dict["extr_1_nozzle_displacement_x"])
-
-            if printer_dict.get("extr_1_nozzle_displacement_y") is not None:
-                printer_dict["extr_1_nozzle_displacement_y"] = float(printer_dict["extr_1_nozzle_displacement_y"])
-
-            if printer_dict.get("extr_2_nozzle_diameter") is not None:
-                printer_dict["extr_2_nozzle_diameter"] = float(printer_dict["extr_2_nozzle_diameter"])
-
-            if printer_dict.get("extr_2_filament_diameter") is not None:
-                printer_dict["extr_2_filament_diameter"] = float(printer_dict["extr_2_filament_diameter"])
-
-            if printer_dict.get("extr_2_nozzle_displacement_x") is not None:
-                printer_dict["extr_2_nozzle_displacement_x"] = float(printer_dict["extr_2_nozzle_displacement_x"])
-
-            if printer_dict.get("extr_2_nozzle_displacement_y") is not None:
-                printer_dict["extr_2_nozzle_displacement_y"] = float(printer_dict["extr_2_nozzle_displacement_y"])
-
-            # Преобразуем булевы значения
-            if printer_dict.get("center_origin") is not None:
-                printer_dict["center_origin"] = bool(printer_dict["center_origin"])
-
-            if printer_dict.get("table_heating") is not None:
-                printer_dict["table_heating"] = bool(printer_dict["table_heating"])
-
-            if printer_dict.get("print_volume_heating") is not None:
-                printer_dict["print_volume_heating"] = bool(printer_dict["print_volume_heating"])
-
-            if printer_dict.get("displace_extruder") is not None:
-                printer_dict["displace_extruder"] = bool(printer_dict["displace_extruder"])
-
-            # Преобразуем числовые значения
-            if printer_dict.get("count_extruder") is not None:
-                printer_dict["count_extruder"] = int(printer_dict["count_extruder"])
-
-            # Создаём новый принтер из данных
-            new_printer = Printer(**printer_dict)
+            new_printer = Printer(**printer_data.model_dump())
 
             session.add(new_printer)
+            await PrinterCatalog.notify_changed(session)
             await session.commit()
+            PrinterCatalog.invalidate()
             await session.refresh(new_printer)
 
             return {
                 "message": "Printer added successfully",
                 "printer_id": new_printer.id
             }
-        except InterruptedError as e:
+        except IntegrityError as e:
             await session.rollback()
             logging.error(f"Database error: {str(e)}")
             raise HTTPException(status_code=409, detail="Printer already exists or violates constraints")
@@ -158,6 +62,96 @@ class PrinterController:
             logging.exception("Unexpected error while adding printer")
             raise HTTPException(status_code=500, detail="Internal server error")
 
+    @staticmethod
+    async def bulk_import(session: AsyncSession, body: bytes, fmt: str):
+        """
+        Массовый импорт принтеров из CSV или JSON Lines с обновлением по name.
+        Некорректные строки пропускаются и возвращаются в errors
+        """
+        if fmt not in ("csv", "jsonl"):
+            raise HTTPException(status_code=400, detail="Format must be csv or jsonl")
+
+        try:
+            rows = parse_rows(body, fmt)
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Malformed {fmt} payload: {e}")
+
+        if len(rows) > BULK_IMPORT_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"At most {BULK_IMPORT_MAX_ROWS} rows per request")
+
+        records, errors = validate_rows(rows)
+        if not records:
+            raise HTTPException(status_code=422, detail={"message": "No valid rows", "errors": errors})
+
+        try:
+            inserted, updated = await PrinterController._upsert_printers(session, records)
+            await PrinterCatalog.notify_changed(session)
+            await session.commit()
+            PrinterCatalog.invalidate()
+        except Exception:
+            await session.rollback()
+            logging.exception("Unexpected error while importing printers")
+            raise HTTPException(status_code=500, detail="Internal server error")
+
+        return {
+            "message": "Printers imported successfully",
+            "inserted": inserted,
+            "updated": updated,
+            "unchanged": len(records) - inserted - updated,
+            "errors": errors
+        }
+
+    @staticmethod
+    async def _upsert_printers(session: AsyncSession, records: List[tuple]) -> Tuple[int, int]:
+        """
+        Загружает записи во временную таблицу через COPY и переносит их в printer
+        запросами INSERT ... ON CONFLICT (name), по одному на набор переданных полей:
+        у существующего принтера обновляются только поля, которые были в строке.
+        Возвращает число новых и число изменённых принтеров (строки, совпадающие
+        с уже сохранёнными значениями, не перезаписываются и не считаются)
+        """
+        columns = ", ".join(IMPORT_FIELDS)
+
+        # Выполняется через сессию, чтобы открыть транзакцию (временная таблица живёт до коммита)
+        await session.execute(text(
+            f"CREATE TEMP TABLE printer_import ON COMMIT DROP AS "
+            f"SELECT {columns}, 0::bigint AS supplied FROM printer WITH NO DATA"
+        ))
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "printer_import", records=records, columns=(*IMPORT_FIELDS, "supplied")
+        )
+
+        inserted = updated = 0
+        # Обычно у всех строк один набор полей (заголовок CSV), поэтому запросов немного
+        for mask in sorted({record[-1] for record in records}):
+            fields = [
+                field for index, field in enumerate(IMPORT_FIELDS)
+                if field != "name" and mask >> index & 1
+            ]
+            conflict = "DO NOTHING"
+            if fields:
+                updates = ", ".join(f"{field} = EXCLUDED.{field}" for field in fields)
+                current = ", ".join(f"printer.{field}" for field in fields)
+                excluded = ", ".join(f"EXCLUDED.{field}" for field in fields)
+                # ROW(...) — чтобы сравнение работало и для одного поля
+                conflict = f"DO UPDATE SET {updates} WHERE ROW({current}) IS DISTINCT FROM ROW({excluded})"
+            result = await session.execute(
+                text(
+                    f"INSERT INTO printer ({columns}) SELECT {columns} FROM printer_import "
+                    f"WHERE supplied = :mask ON CONFLICT (name) {conflict} "
+                    f"RETURNING (xmax = 0) AS inserted"
+                ),
+                {"mask": mask},
+            )
+            for (inserted_row,) in result:
+                if inserted_row:
+                    inserted += 1
+                else:
+                    updated += 1
+        return inserted, updated
+
     @staticmethod
     async def create_default_printers(session: AsyncSession):
         default_printers = [
@@ -760,7 +754,9 @@ class PrinterController:
             for printer_data in default_printers:
                 new_printer = Printer(**printer_data)
                 session.add(new_printer)
+            await PrinterCatalog.notify_changed(session)
             await session.commit()
+            PrinterCatalog.invalidate()
         except Exception as e:
             await session.rollback()
             raise HTTPException(status_code=500, detail=str(e))
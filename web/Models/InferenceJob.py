@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from database import DataBase
+
+
+class InferenceJob(DataBase):
+    __tablename__ = 'inference_job'
+
+    id = Column(String(32), primary_key=True)  # uuid4 в hex, выдаётся клиенту
+    status = Column(String(16), nullable=False, default='queued')  # queued / running / done / failed
+    printer_id = Column(Integer, ForeignKey('printer.id'), nullable=False)
+    quality = Column(Integer, nullable=False)
+    img_path = Column(String(127), nullable=False)
+    cache_key = Column(String(127), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    print_id = Column(Integer, ForeignKey('print.id'), nullable=True)  # Заполняется по завершении
+    defect = Column(ARRAY(Integer), nullable=True)
+    error = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    # Не забирать задание раньше этого момента (пауза перед повторной попыткой)
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Индекс для выборки следующего задания из очереди
+    __table_args__ = (
+        Index('ix_inference_job_status_created_at', 'status', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<InferenceJob {self.id} {self.status}>'
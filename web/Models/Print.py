@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, ARRAY
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import declarative_base, relationship
@@ -14,6 +15,13 @@ class Print(DataBase):
     img_path = Column(String(127), nullable=False)
     quality = Column(Integer, nullable=False)
 
+    # Индексы под постраничную выборку /api/prints/ с фильтрами
+    __table_args__ = (
+        Index('ix_print_printer_id_id', 'printer_id', 'id'),
+        Index('ix_print_quality_id', 'quality', 'id'),
+        Index('ix_print_defect', 'defect', postgresql_using='gin'),
+    )
+
     def __init__(self, printer_id, defect, img_path, quality):
         self.printer_id = printer_id
         self.defect = defect
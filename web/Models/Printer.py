@@ -44,6 +44,9 @@ class Printer(DataBase):
     def __repr__(self):
         return f"<Printer(name={self.name})>"
 
+# Поля принтера в ответах API (в порядке колонок таблицы)
+PRINTER_FIELDS = tuple(column.name for column in Printer.__table__.columns)
+
 # Схема PrinterSchema
 class PrinterSchema(Schema):
     id = fields.Integer(dump_only=True)
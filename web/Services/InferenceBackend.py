@@ -0,0 +1,132 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from config import (
+    INFERENCE_BACKEND,
+    TRITON_GRPC_URL,
+    TRITON_MODEL_NAME,
+    TRITON_GRPC_STREAMING,
+    TRITON_GRPC_KEEPALIVE_MS,
+    TRITON_GRPC_TIMEOUT,
+    ONNX_MODEL_PATH,
+    ONNX_INTRA_OP_THREADS,
+    ONNX_INTER_OP_THREADS,
+    ONNX_CONCURRENCY,
+)
+from Services.HttpClient import HttpClient
+from Services.TritonClient import TritonClient
+from Services.TritonGrpcClient import TritonGrpcClient
+
+
+class TritonBackend:
+    """
+    Инференс через HTTP-запросы к Triton (сессия — общий пул HttpClient)
+    """
+    name = "triton"
+
+    async def infer(self, batch: np.ndarray) -> Optional[np.ndarray]:
+        return await TritonClient.infer(HttpClient.get_session(), batch)
+
+    async def close(self):
+        pass
+
+
+class TritonGrpcBackend:
+    """
+    Инференс через gRPC к Triton (постоянный канал, при TRITON_GRPC_STREAMING — общий поток)
+    """
+    name = "triton_grpc"
+
+    def __init__(self, url: str, model_name: str, streaming: bool, keepalive_ms: int, timeout: float):
+        self._client = TritonGrpcClient(url, model_name, streaming, keepalive_ms, timeout)
+
+    async def infer(self, batch: np.ndarray) -> Optional[np.ndarray]:
+        return await self._client.infer(batch)
+
+    async def close(self):
+        await self._client.close()
+
+
+class OnnxRuntimeBackend:
+    """
+    Инференс экспортированной модели в ONNX Runtime на CPU внутри процесса.
+    Вызовы session.run отпускают GIL и выполняются в отдельном пуле потоков
+    """
+    name = "onnx"
+
+    def __init__(self, model_path: str, intra_op_threads: int, inter_op_threads: int, concurrency: int):
+        # onnxruntime нужен только для этого режима, поэтому импортируем его здесь
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError(
+                "INFERENCE_BACKEND=onnx requires the onnxruntime package: "
+                "pip install -r requirements-onnx.txt or build the image with INFERENCE_EXTRAS=onnx"
+            ) from e
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = (
+            ort.ExecutionMode.ORT_PARALLEL if inter_op_threads > 1 else ort.ExecutionMode.ORT_SEQUENTIAL
+        )
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self._session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_name = self._session.get_inputs()[0].name
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="onnx")
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self._session.run(None, {self._input_name: batch})[0]
+
+    async def infer(self, batch: np.ndarray) -> Optional[np.ndarray]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run, batch)
+
+    async def close(self):
+        self._executor.shutdown(wait=True)
+
+
+class InferenceBackend:
+    """
+    Выбранный в конфигурации бэкенд инференса (INFERENCE_BACKEND).
+    Создаётся и закрывается в lifespan приложения
+    """
+    _backend = None
+
+    @classmethod
+    async def start(cls):
+        if cls._backend is not None:
+            return
+        if INFERENCE_BACKEND == "triton":
+            cls._backend = TritonBackend()
+        elif INFERENCE_BACKEND == "triton_grpc":
+            cls._backend = TritonGrpcBackend(
+                TRITON_GRPC_URL, TRITON_MODEL_NAME, TRITON_GRPC_STREAMING, TRITON_GRPC_KEEPALIVE_MS, TRITON_GRPC_TIMEOUT
+            )
+        elif INFERENCE_BACKEND == "onnx":
+            cls._backend = OnnxRuntimeBackend(
+                ONNX_MODEL_PATH, ONNX_INTRA_OP_THREADS, ONNX_INTER_OP_THREADS, ONNX_CONCURRENCY
+            )
+        else:
+            raise ValueError(f"Unknown INFERENCE_BACKEND: {INFERENCE_BACKEND}")
+
+    @classmethod
+    async def stop(cls):
+        if cls._backend is not None:
+            await cls._backend.close()
+            cls._backend = None
+
+    @classmethod
+    async def infer(cls, batch: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Возвращает логиты модели для батча [N, 3, 500, 500]
+        или None, если бэкенд ответил ошибкой
+        """
+        if cls._backend is None:
+            raise RuntimeError("Inference backend is not started")
+        return await cls._backend.infer(batch)
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import BATCH_ENABLED, BATCH_MAX_SIZE, BATCH_MAX_DELAY_MS
+
+# Обработчик батча: принимает тензор [N, ...] и контексты запросов (N штук),
+# возвращает N результатов (по одному на запрос)
+BatchHandler = Callable[[np.ndarray, List[Any]], Awaitable[List[Any]]]
+
+
+class InferenceBatcher:
+    """
+    Очередь динамического батчинга: собирает одновременные запросы в течение
+    BATCH_MAX_DELAY_MS (или до BATCH_MAX_SIZE штук), отправляет их одним батчем
+    и раздаёт результаты ожидающим future
+    """
+    _handler: Optional[BatchHandler] = None
+    _queue: Optional[asyncio.Queue] = None
+    _worker: Optional[asyncio.Task] = None
+    _in_flight: Set[asyncio.Task] = set()
+
+    @classmethod
+    async def start(cls, handler: BatchHandler):
+        cls._handler = handler
+        if BATCH_ENABLED and cls._worker is None:
+            cls._queue = asyncio.Queue()
+            cls._worker = asyncio.create_task(cls._collect())
+
+    @classmethod
+    async def stop(cls):
+        if cls._worker is not None:
+            cls._worker.cancel()
+            try:
+                await cls._worker
+            except asyncio.CancelledError:
+                pass
+            cls._worker = None
+
+        if cls._in_flight:
+            await asyncio.gather(*cls._in_flight, return_exceptions=True)
+
+        # Запросы, не попавшие в батч, завершаем ошибкой
+        while cls._queue is not None and not cls._queue.empty():
+            _, _, future = cls._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Inference batcher is stopped"))
+        cls._queue = None
+
+    @classmethod
+    async def submit(cls, tensor: np.ndarray, context: Any = None) -> Any:
+        """
+        Ставит в очередь один тензор [C, H, W] (или [1, C, H, W]) и ждёт свой результат.
+        context передаётся обработчику батча вместе с тензором
+        """
+        if cls._handler is None:
+            raise RuntimeError("Inference batcher is not started")
+
+        if tensor.ndim == 4:
+            tensor = tensor[0]
+
+        if cls._worker is None:
+            # Батчинг отключён: отправляем батч из одного элемента
+            results = await cls._handler(tensor[np.newaxis], [context])
+            return results[0]
+
+        future = asyncio.get_running_loop().create_future()
+        await cls._queue.put((tensor, context, future))
+        return await future
+
+    @classmethod
+    async def _collect(cls):
+        loop = asyncio.get_running_loop()
+        max_delay = BATCH_MAX_DELAY_MS / 1000
+
+        while True:
+            batch = [await cls._queue.get()]
+            deadline = loop.time() + max_delay
+
+            while len(batch) < BATCH_MAX_SIZE:
+                if not cls._queue.empty():
+                    batch.append(cls._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(cls._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Батч обрабатывается отдельной задачей, чтобы сразу начать собирать следующий
+            task = asyncio.create_task(cls._run(batch))
+            cls._in_flight.add(task)
+            task.add_done_callback(cls._in_flight.discard)
+
+    @classmethod
+    async def _run(cls, batch: List[Tuple[np.ndarray, Any, asyncio.Future]]):
+        futures = [future for _, _, future in batch]
+        try:
+            results = await cls._handler(
+                np.stack([tensor for tensor, _, _ in batch]),
+                [context for _, context, _ in batch]
+            )
+        except Exception as e:
+            logging.exception("Batched inference failed")
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            # Клиент мог отменить запрос, пока батч обрабатывался
+            if not future.done():
+                future.set_result(result)
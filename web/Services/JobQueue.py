@@ -0,0 +1,171 @@
+import asyncio
+import uuid
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, exists, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY
+from Models.InferenceJob import InferenceJob
+from Models.Print import Print
+
+
+class JobQueue:
+    """
+    Очередь заданий распознавания в PostgreSQL (SELECT ... FOR UPDATE SKIP LOCKED)
+    """
+    # Будит обработчики этого процесса сразу после постановки задания
+    wakeup = asyncio.Event()
+
+    @staticmethod
+    def new_job(printer_id: int, quality: int, img_path: str, cache_key: str) -> InferenceJob:
+        return InferenceJob(
+            id=uuid.uuid4().hex,
+            status='queued',
+            printer_id=printer_id,
+            quality=quality,
+            img_path=img_path,
+            cache_key=cache_key,
+            attempts=0
+        )
+
+    @staticmethod
+    async def claim(session: AsyncSession) -> Optional[InferenceJob]:
+        """
+        Забирает следующее задание (новое, отложенное до наступления available_at
+        или брошенное упавшим воркером, если у него остались попытки)
+        и помечает его как running. Возвращает None, если очередь пуста
+        """
+        lease_expired = func.now() - timedelta(seconds=JOB_LEASE_SECONDS)
+        query = (
+            select(InferenceJob)
+            .where(or_(
+                and_(InferenceJob.status == 'queued', InferenceJob.available_at <= func.now()),
+                and_(InferenceJob.status == 'running', InferenceJob.locked_at < lease_expired,
+                     InferenceJob.attempts < JOB_MAX_ATTEMPTS)
+            ))
+            .order_by(InferenceJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(query)
+        job = result.scalar_one_or_none()
+        if job is None:
+            await session.rollback()
+            return None
+
+        job.status = 'running'
+        job.locked_at = func.now()
+        job.attempts += 1
+        await session.commit()
+        await session.refresh(job)
+        return job
+
+    @staticmethod
+    def _leased(job: InferenceJob):
+        """
+        Условие «задание всё ещё за этим обработчиком»: если аренда истекла и задание забрал
+        другой обработчик, locked_at уже другой, и запоздавший результат не записывается
+        """
+        return and_(
+            InferenceJob.id == job.id,
+            InferenceJob.status == 'running',
+            InferenceJob.locked_at == job.locked_at
+        )
+
+    @staticmethod
+    async def complete(session: AsyncSession, job: InferenceJob, print_id: int, defect: List[int]) -> bool:
+        """
+        Помечает задание done в текущей транзакции (коммит — на вызывающей стороне).
+        Возвращает False, если аренда потеряна: тогда транзакцию нужно откатить
+        """
+        result = await session.execute(
+            update(InferenceJob)
+            .where(JobQueue._leased(job))
+            .values(status='done', print_id=print_id, defect=defect, error=None, finished_at=func.now())
+        )
+        return result.rowcount == 1
+
+    @staticmethod
+    async def release(session: AsyncSession, job: InferenceJob, delay: float):
+        """
+        Возвращает задание в очередь не раньше чем через delay секунд, не расходуя попытку
+        (задание не выполнялось, например, из-за переполненной очереди предобработки)
+        """
+        await session.execute(
+            update(InferenceJob)
+            .where(JobQueue._leased(job))
+            .values(
+                status='queued',
+                attempts=InferenceJob.attempts - 1,
+                locked_at=None,
+                available_at=func.now() + timedelta(seconds=delay)
+            )
+        )
+        await session.commit()
+
+    @staticmethod
+    async def fail(session: AsyncSession, job: InferenceJob, error: str) -> bool:
+        """
+        Возвращает задание в очередь с паузой JOB_RETRY_DELAY, удваивающейся с каждой попыткой,
+        или, если попытки исчерпаны, помечает его failed. Возвращает True, если задание завершено.
+        Задание, аренду которого уже забрал другой обработчик, не меняется
+        """
+        final = job.attempts >= JOB_MAX_ATTEMPTS
+        delay = JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+        result = await session.execute(
+            update(InferenceJob)
+            .where(JobQueue._leased(job))
+            .values(
+                status='failed' if final else 'queued',
+                error=error[:255],
+                locked_at=None,
+                available_at=func.now() + timedelta(seconds=delay),
+                finished_at=func.now() if final else None
+            )
+        )
+        await session.commit()
+        return final and result.rowcount == 1
+
+    @staticmethod
+    async def expire(session: AsyncSession) -> List[Tuple[str, str]]:
+        """
+        Помечает failed брошенные задания, у которых не осталось попыток (claim их больше не берёт).
+        Возвращает пары (id задания, img_path)
+        """
+        lease_expired = func.now() - timedelta(seconds=JOB_LEASE_SECONDS)
+        result = await session.execute(
+            update(InferenceJob)
+            .where(
+                InferenceJob.status == 'running',
+                InferenceJob.locked_at < lease_expired,
+                InferenceJob.attempts >= JOB_MAX_ATTEMPTS
+            )
+            .values(status='failed', error='Job lease expired', locked_at=None, finished_at=func.now())
+            .returning(InferenceJob.id, InferenceJob.img_path)
+        )
+        expired = [tuple(row) for row in result]
+        await session.commit()
+        return expired
+
+    @staticmethod
+    async def upload_unused(session: AsyncSession, img_path: str, job_id: Optional[str] = None) -> bool:
+        """
+        Не ссылаются ли на файл записи о печати и незавершённые задания (кроме job_id).
+        Хранилище адресовано по содержимому, поэтому один файл может быть общим
+        """
+        used_by_print = exists().where(Print.img_path == img_path)
+        used_by_job = exists().where(
+            InferenceJob.img_path == img_path,
+            InferenceJob.status.in_(('queued', 'running'))
+        )
+        if job_id is not None:
+            used_by_job = used_by_job.where(InferenceJob.id != job_id)
+        result = await session.execute(select(or_(used_by_print, used_by_job)))
+        return not result.scalar()
+
+    @staticmethod
+    async def get(session: AsyncSession, job_id: str) -> Optional[InferenceJob]:
+        result = await session.execute(select(InferenceJob).where(InferenceJob.id == job_id))
+        return result.scalar_one_or_none()
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from typing import List
+
+from fastapi import HTTPException
+
+from config import JOB_WORKERS, JOB_POLL_INTERVAL, JOB_LEASE_SECONDS, JOB_BACKPRESSURE_DELAY
+from database import AsyncSessionLocal
+from Controllers.PrintController import PrintController
+from Models.InferenceJob import InferenceJob
+from Services.JobQueue import JobQueue
+
+
+class JobWorker:
+    """
+    Обработчики очереди заданий распознавания внутри процесса веб-сервиса.
+    Число одновременно обрабатываемых заданий на воркер uvicorn — JOB_WORKERS
+    """
+    _tasks: List[asyncio.Task] = []
+    # Когда последний раз искали брошенные задания без оставшихся попыток (time.monotonic)
+    _expired_at = 0.0
+
+    @classmethod
+    async def start(cls):
+        if not cls._tasks:
+            cls._tasks = [asyncio.create_task(cls._run()) for _ in range(JOB_WORKERS)]
+
+    @classmethod
+    async def stop(cls):
+        for task in cls._tasks:
+            task.cancel()
+        await asyncio.gather(*cls._tasks, return_exceptions=True)
+        cls._tasks = []
+
+    @classmethod
+    async def _run(cls):
+        while True:
+            JobQueue.wakeup.clear()
+            try:
+                async with AsyncSessionLocal() as session:
+                    job = await JobQueue.claim(session)
+            except Exception:
+                logging.exception("Failed to claim inference job")
+                job = None
+
+            if job is None:
+                await cls._expire()
+                # Очередь пуста: ждём нового задания в этом процессе или следующего опроса
+                try:
+                    await asyncio.wait_for(JobQueue.wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await cls._process(job)
+
+    @classmethod
+    async def _process(cls, job: InferenceJob):
+        try:
+            defects = await PrintController.detect_defects(
+                job.img_path, job.cache_key, job.printer_id, job.quality
+            )
+            if defects is None:
+                raise RuntimeError("Inference backend returned an error")
+
+            # Запись о печати и завершение задания — в одной транзакции
+            async with AsyncSessionLocal() as session:
+                new_print = await PrintController.create_print(
+                    session, job.printer_id, job.quality, job.img_path, defects
+                )
+                if not await JobQueue.complete(session, job, new_print.id, defects):
+                    # Аренда истекла, и задание уже забрал другой обработчик: его запись о печати не дублируем
+                    await session.rollback()
+                    logging.warning(f"Inference job {job.id} lease lost, result discarded")
+                    return
+                await session.commit()
+        except asyncio.CancelledError:
+            raise
+        except HTTPException as e:
+            if e.status_code != 429:
+                await cls._fail(job, str(e.detail) or e.__class__.__name__)
+                return
+            # Очередь предобработки переполнена: задание не выполнялось, попытка не расходуется.
+            # Обработчик тоже ждёт, чтобы не перебирать очередь вхолостую
+            async with AsyncSessionLocal() as session:
+                await JobQueue.release(session, job, JOB_BACKPRESSURE_DELAY)
+            await asyncio.sleep(JOB_BACKPRESSURE_DELAY)
+        except Exception as e:
+            await cls._fail(job, str(e) or e.__class__.__name__)
+
+    @classmethod
+    async def _fail(cls, job: InferenceJob, error: str):
+        logging.exception(f"Inference job {job.id} failed")
+        async with AsyncSessionLocal() as session:
+            if await JobQueue.fail(session, job, error):
+                await PrintController.discard_upload(session, job.img_path, job.id)
+
+    @classmethod
+    async def _expire(cls):
+        now = time.monotonic()
+        if now - cls._expired_at < JOB_LEASE_SECONDS:
+            return
+        cls._expired_at = now
+        try:
+            async with AsyncSessionLocal() as session:
+                for job_id, img_path in await JobQueue.expire(session):
+                    logging.error(f"Inference job {job_id} failed: lease expired after the last attempt")
+                    await PrintController.discard_upload(session, img_path, job_id)
+        except Exception:
+            logging.exception("Failed to expire abandoned inference jobs")
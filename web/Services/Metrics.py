@@ -0,0 +1,34 @@
+from collections import defaultdict
+from typing import Dict
+
+
+class Metrics:
+    """
+    Простые счётчики и замеры времени в памяти процесса
+    """
+    _counters: Dict[str, int] = defaultdict(int)
+    _gauges: Dict[str, float] = {}
+    _timings: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def inc(cls, name: str, value: int = 1):
+        cls._counters[name] += value
+
+    @classmethod
+    def set_gauge(cls, name: str, value: float):
+        cls._gauges[name] = value
+
+    @classmethod
+    def observe(cls, name: str, seconds: float):
+        timing = cls._timings.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+        timing["count"] += 1
+        timing["sum"] += seconds
+        timing["max"] = max(timing["max"], seconds)
+
+    @classmethod
+    def snapshot(cls) -> dict:
+        timings = {
+            name: {**timing, "avg": timing["sum"] / timing["count"] if timing["count"] else 0.0}
+            for name, timing in cls._timings.items()
+        }
+        return {"counters": dict(cls._counters), "gauges": dict(cls._gauges), "timings": timings}
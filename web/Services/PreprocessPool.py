@@ -0,0 +1,68 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Union
+
+import numpy as np
+from fastapi import HTTPException
+
+from config import PREPROCESS_EXECUTOR, PREPROCESS_WORKERS, PREPROCESS_QUEUE_SIZE
+from Services.Metrics import Metrics
+from Services.Preprocessing import timed_preprocess
+
+
+class PreprocessPool:
+    """
+    Выносит декодирование и предобработку изображений из event loop в пул
+    потоков или процессов. Очередь ограничена: при переполнении отдаём 429
+    """
+    _executor: Optional[Executor] = None
+    _pending = 0
+
+    @classmethod
+    async def start(cls):
+        if cls._executor is None:
+            if PREPROCESS_EXECUTOR == "process":
+                cls._executor = ProcessPoolExecutor(max_workers=PREPROCESS_WORKERS)
+            else:
+                cls._executor = ThreadPoolExecutor(max_workers=PREPROCESS_WORKERS,
+                                                   thread_name_prefix="preprocess")
+        Metrics.set_gauge("preprocess_queue_depth", cls._pending)
+        Metrics.set_gauge("preprocess_workers", PREPROCESS_WORKERS)
+
+    @classmethod
+    async def stop(cls):
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=True)
+            cls._executor = None
+
+    @classmethod
+    async def run(cls, source: Union[bytes, str]) -> np.ndarray:
+        """
+        Возвращает тензор [3, 500, 500] для изображения (байты или путь к файлу).
+        Путь предпочтительнее: в пул процессов передаётся только строка
+        """
+        if cls._executor is None:
+            raise RuntimeError("Preprocess pool is not started")
+
+        if cls._pending >= PREPROCESS_QUEUE_SIZE:
+            Metrics.inc("preprocess_rejected")
+            raise HTTPException(status_code=429, detail="Too many images in processing, try again later")
+
+        cls._pending += 1
+        Metrics.set_gauge("preprocess_queue_depth", cls._pending)
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            tensor, elapsed = await loop.run_in_executor(
+                cls._executor, timed_preprocess, source, PREPROCESS_EXECUTOR == "process"
+            )
+        finally:
+            cls._pending -= 1
+            Metrics.set_gauge("preprocess_queue_depth", cls._pending)
+
+        Metrics.inc("preprocess_completed")
+        Metrics.observe("preprocess_seconds", elapsed)
+        # Полное время с учётом ожидания свободного воркера
+        Metrics.observe("preprocess_total_seconds", time.perf_counter() - started)
+        return tensor
@@ -0,0 +1,67 @@
+import io
+import time
+from typing import Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from config import PREPROCESS_JPEG_DRAFT
+
+# Размер входа модели (ширина, высота)
+INPUT_SIZE = (500, 500)
+
+# Нормализация ImageNet: (x / 255 - mean) / std == x * SCALE + OFFSET
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+SCALE = (1.0 / (255.0 * STD)).astype(np.float32)
+OFFSET = (-MEAN / STD).astype(np.float32)
+
+# Буфер результата, переиспользуемый внутри процесса пула (только PREPROCESS_EXECUTOR=process,
+# см. timed_preprocess)
+_buffer: Optional[np.ndarray] = None
+
+
+def preprocess_image(source: Union[bytes, str], out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Декодирует изображение (байты или путь к файлу) и возвращает тензор [3, 500, 500] float32.
+    Повторяет Resize((500, 500)) + ToTensor() + Normalize() из torchvision,
+    используя только Pillow и NumPy. Если передан out, результат пишется в него.
+    При PREPROCESS_JPEG_DRAFT большие JPEG декодируются в уменьшенном масштабе:
+    это быстрее, но результат уже отличается от torchvision (см. config.py)
+    """
+    image = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+    if PREPROCESS_JPEG_DRAFT:
+        # JPEG декодируется сразу в уменьшенном масштабе (не меньше INPUT_SIZE); включается явно
+        image.draft("RGB", INPUT_SIZE)
+    image = image.convert("RGB").resize(INPUT_SIZE, Image.BILINEAR)
+    pixels = np.asarray(image)
+
+    if out is None:
+        out = np.empty((3, INPUT_SIZE[1], INPUT_SIZE[0]), dtype=np.float32)
+
+    # HWC uint8 -> CHW float32 с нормализацией без промежуточных массивов
+    for channel in range(3):
+        np.multiply(pixels[..., channel], SCALE[channel], out=out[channel])
+        out[channel] += OFFSET[channel]
+    return out
+
+
+def timed_preprocess(source: Union[bytes, str], reuse_buffer: bool = False) -> Tuple[np.ndarray, float]:
+    """
+    То же, что preprocess_image, но дополнительно возвращает время работы.
+    Функция верхнего уровня, чтобы её можно было передать в ProcessPoolExecutor.
+    reuse_buffer допустим только в пуле процессов: результат всё равно копируется
+    при передаче в основной процесс, поэтому буфер можно использовать повторно.
+    В пуле потоков (режим по умолчанию) тензор на каждое изображение выделяется заново:
+    он ждёт в очереди InferenceBatcher до np.stack, и общий буфер потока
+    перезаписало бы следующее изображение
+    """
+    global _buffer
+    started = time.perf_counter()
+    if reuse_buffer:
+        if _buffer is None:
+            _buffer = np.empty((3, INPUT_SIZE[1], INPUT_SIZE[0]), dtype=np.float32)
+        tensor = preprocess_image(source, out=_buffer)
+    else:
+        tensor = preprocess_image(source)
+    return tensor, time.perf_counter() - started
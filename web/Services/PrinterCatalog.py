@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import asyncpg
+import orjson
+from fastapi import Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import (
+    CATALOG_CACHE_TTL,
+    CATALOG_CACHE_CONTROL,
+    CATALOG_LISTEN_NOTIFY,
+    CATALOG_LISTEN_RETRY_MIN,
+    CATALOG_LISTEN_RETRY_MAX,
+)
+from Models.Printer import Printer, PRINTER_FIELDS
+from Services.Serialization import select_columns, rows_to_dicts
+
+# Канал PostgreSQL, в который пишется уведомление об изменении каталога
+NOTIFY_CHANNEL = "printer_catalog"
+
+
+@dataclass
+class CatalogSnapshot:
+    loaded_at: float
+    body: bytes  # Готовый JSON-ответ со всем каталогом
+    etag: str
+    items: Dict[int, Tuple[bytes, str]] = field(default_factory=dict)  # id -> (JSON, ETag)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def serialize(data) -> Tuple[bytes, str]:
+    body = orjson.dumps({"message": "OK", "data": data})
+    return body, make_etag(body)
+
+
+class PrinterCatalog:
+    """
+    Кэш каталога принтеров в памяти процесса. Ответы сериализуются один раз,
+    сбрасываются при записи (локально и в других воркерах через LISTEN/NOTIFY)
+    """
+    _snapshot: Optional[CatalogSnapshot] = None
+    _version = 0
+    _listener: Optional[asyncpg.Connection] = None
+    _database_url: Optional[str] = None  # None — LISTEN не нужен (не запущен или остановлен)
+    _reconnect_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def invalidate(cls):
+        cls._version += 1
+        cls._snapshot = None
+
+    @classmethod
+    async def get(cls, session: AsyncSession) -> CatalogSnapshot:
+        snapshot = cls._snapshot
+        if snapshot is not None:
+            # Без работающего LISTEN полагаемся на TTL
+            if cls._listener is not None or time.monotonic() - snapshot.loaded_at < CATALOG_CACHE_TTL:
+                return snapshot
+
+        version = cls._version
+        result = await session.execute(select_columns(Printer, PRINTER_FIELDS).order_by(Printer.id))
+        printers = rows_to_dicts(PRINTER_FIELDS, result.all())
+
+        body, etag = serialize(printers)
+        snapshot = CatalogSnapshot(loaded_at=time.monotonic(), body=body, etag=etag)
+        for printer in printers:
+            snapshot.items[printer["id"]] = serialize(printer)
+
+        # Каталог могли изменить, пока шла загрузка — такой снимок не сохраняем
+        if version == cls._version:
+            cls._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    async def notify_changed(session: AsyncSession):
+        """
+        Ставит уведомление об изменении каталога в текущую транзакцию
+        (PostgreSQL доставит его остальным воркерам после коммита)
+        """
+        if CATALOG_LISTEN_NOTIFY:
+            await session.execute(text("SELECT pg_notify(:channel, '')"), {"channel": NOTIFY_CHANNEL})
+
+    @staticmethod
+    def response(body: bytes, etag: str, if_none_match: Optional[str]) -> Response:
+        headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+        if if_none_match and (if_none_match.strip() == "*" or etag in
+                              [tag.strip() for tag in if_none_match.split(",")]):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    @classmethod
+    async def start(cls, database_url: str):
+        if not CATALOG_LISTEN_NOTIFY or cls._database_url is not None:
+            return
+        cls._database_url = database_url
+        try:
+            await cls._connect()
+        except Exception:
+            logging.exception("Printer catalog LISTEN is unavailable, falling back to TTL")
+            cls._schedule_reconnect()
+
+    @classmethod
+    async def stop(cls):
+        cls._database_url = None
+        if cls._reconnect_task is not None:
+            cls._reconnect_task.cancel()
+            cls._reconnect_task = None
+        if cls._listener is not None:
+            listener, cls._listener = cls._listener, None
+            await listener.close()
+
+    @classmethod
+    async def _connect(cls):
+        listener = await asyncpg.connect(cls._database_url)
+        try:
+            await listener.add_listener(NOTIFY_CHANNEL, cls._on_notify)
+        except Exception:
+            await listener.close()
+            raise
+        listener.add_termination_listener(cls._on_terminate)
+        cls._listener = listener
+        # Пока соединения не было, уведомления могли быть пропущены
+        cls.invalidate()
+
+    @classmethod
+    def _schedule_reconnect(cls):
+        if cls._database_url is not None and (cls._reconnect_task is None or cls._reconnect_task.done()):
+            cls._reconnect_task = asyncio.get_running_loop().create_task(cls._reconnect())
+
+    @classmethod
+    async def _reconnect(cls):
+        """
+        Переподключение LISTEN в фоне с экспоненциальной паузой; до успеха кэш живёт по TTL
+        """
+        delay = CATALOG_LISTEN_RETRY_MIN
+        while cls._database_url is not None and cls._listener is None:
+            await asyncio.sleep(delay)
+            try:
+                await cls._connect()
+                logging.info("Printer catalog LISTEN reconnected")
+            except Exception as e:
+                logging.warning(f"Printer catalog LISTEN reconnect failed: {e}")
+                delay = min(delay * 2, CATALOG_LISTEN_RETRY_MAX)
+
+    @classmethod
+    def _on_notify(cls, connection, pid, channel, payload):
+        cls.invalidate()
+
+    @classmethod
+    def _on_terminate(cls, connection):
+        # Уведомления больше не приходят: сбрасываем кэш, до переподключения работаем по TTL
+        if connection is not cls._listener:
+            return
+        cls._listener = None
+        cls.invalidate()
+        cls._schedule_reconnect()
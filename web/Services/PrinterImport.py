@@ -0,0 +1,86 @@
+import csv
+import io
+from typing import Any, Dict, List, Tuple
+
+import orjson
+
+from Models.Printer import Printer
+from Services.PrinterValidation import validate_printers
+
+# Поля, которые можно передавать при импорте (id назначает база)
+IMPORT_FIELDS = tuple(column.name for column in Printer.__table__.columns if column.name != "id")
+# Ключ, под которым csv.DictReader собирает ячейки сверх заголовка
+EXTRA_CELLS = "__extra__"
+
+
+class MalformedRow:
+    """
+    Строка JSON Lines, которую не удалось разобрать; попадает в errors, как и ошибки проверки
+    """
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+def supplied_mask(fields) -> int:
+    """
+    Битовая маска переданных полей (бит i — IMPORT_FIELDS[i]): при обновлении
+    существующего принтера меняются только они
+    """
+    return sum(1 << IMPORT_FIELDS.index(field) for field in fields)
+
+
+def parse_rows(body: bytes, fmt: str) -> List[Any]:
+    """
+    Разбирает тело запроса в список словарей.
+    csv — первая строка заголовок, пустые ячейки — значение NULL, строки с лишними ячейками
+    становятся MalformedRow; jsonl — по одному JSON-объекту на строку,
+    нераспознанные строки становятся MalformedRow
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")), restkey=EXTRA_CELLS)
+        return [
+            MalformedRow("Unexpected extra column") if EXTRA_CELLS in row
+            else {key: (value if value != "" else None) for key, value in row.items()}
+            for row in reader
+        ]
+
+    rows = []
+    for line in body.splitlines():
+        if line.strip():
+            try:
+                rows.append(orjson.loads(line))
+            except orjson.JSONDecodeError as e:
+                rows.append(MalformedRow(f"Malformed JSON: {e}"))
+    return rows
+
+
+def validate_rows(rows: List[Any]) -> Tuple[List[tuple], List[dict]]:
+    """
+    Проверяет и приводит типы всех строк (модель PrinterCreate). Возвращает записи для COPY
+    (кортежи в порядке IMPORT_FIELDS и маска переданных полей последним элементом,
+    по одной на name — побеждает последняя, более ранние строки с тем же name попадают в ошибки)
+    и список ошибок вида {"row": номер строки с 1, "errors": {поле: сообщение}}
+    """
+    errors = {index: {"__root__": row.message} for index, row in enumerate(rows) if isinstance(row, MalformedRow)}
+    parsed = [(index, row) for index, row in enumerate(rows) if index not in errors]
+    models, row_errors = validate_printers([row for _, row in parsed])
+    errors.update((parsed[position][0], message) for position, message in row_errors.items())
+
+    records: Dict[str, tuple] = {}
+    # name -> номер строки (с 0), из которой взята запись
+    sources: Dict[str, int] = {}
+    for position in sorted(models):
+        model = models[position]
+        index = parsed[position][0]
+        if model.name in sources:
+            errors[sources[model.name]] = {"name": f"Duplicate name, superseded by row {index + 1}"}
+        sources[model.name] = index
+        records[model.name] = (
+            *(getattr(model, field) for field in IMPORT_FIELDS),
+            supplied_mask(model.model_fields_set),
+        )
+    return (
+        list(records.values()),
+        [{"row": index + 1, "errors": messages} for index, messages in sorted(errors.items())],
+    )
@@ -0,0 +1,60 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ConfigDict, Field, ValidationError, create_model
+from sqlalchemy import Boolean, Float, Integer, String
+
+from Models.Printer import Printer
+
+# Соответствие типов колонок SQLAlchemy и Python
+_COLUMN_TYPES = ((Boolean, bool), (Integer, int), (Float, float), (String, str))
+
+
+def _field_definition(column) -> Tuple[Any, Any]:
+    python_type = next(py_type for sa_type, py_type in _COLUMN_TYPES if isinstance(column.type, sa_type))
+    max_length = getattr(column.type, "length", None) if python_type is str else None
+
+    if not column.nullable:
+        return python_type, Field(..., min_length=1 if python_type is str else None, max_length=max_length)
+    return Optional[python_type], Field(None, max_length=max_length)
+
+
+def build_printer_model():
+    """
+    Pydantic-модель входных данных принтера, построенная по колонкам Printer:
+    типы, обязательность и максимальная длина строк берутся из таблицы
+    """
+    fields = {
+        column.name: _field_definition(column)
+        for column in Printer.__table__.columns
+        if column.name != "id"
+    }
+    return create_model("PrinterCreate", __config__=ConfigDict(extra="forbid"), **fields)
+
+
+PrinterCreate = build_printer_model()
+
+
+def error_details(errors) -> Dict[str, str]:
+    """
+    Ошибки pydantic в виде {поле: сообщение}
+    """
+    details = {}
+    for error in errors:
+        field = ".".join(str(part) for part in error["loc"]) or "__root__"
+        details[field] = error["msg"]
+    return details
+
+
+def validate_printers(rows: List[Any]) -> Tuple[Dict[int, Any], Dict[int, Dict[str, str]]]:
+    """
+    Проверяет список входных строк. Возвращает {индекс: модель} для корректных строк
+    и {индекс: {поле: сообщение}} для остальных
+    """
+    validate = PrinterCreate.model_validate
+    models, errors = {}, {}
+    for index, row in enumerate(rows):
+        try:
+            models[index] = validate(row)
+        except ValidationError as e:
+            errors[index] = error_details(e.errors())
+    return models, errors
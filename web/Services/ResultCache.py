@@ -0,0 +1,109 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config import (
+    MODEL_VERSION,
+    RESULT_CACHE_BACKEND,
+    RESULT_CACHE_SIZE,
+    RESULT_CACHE_TTL,
+    RESULT_CACHE_REDIS_URL,
+)
+from Services.Metrics import Metrics
+
+
+class MemoryCacheBackend:
+    """
+    LRU-кэш в памяти процесса с ограничением по времени жизни записей
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[dict]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: dict):
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    async def close(self):
+        self._items.clear()
+
+
+class RedisCacheBackend:
+    """
+    Общий для всех воркеров кэш в Redis (вытеснение LRU настраивается на стороне Redis)
+    """
+
+    def __init__(self, url: str, ttl: int):
+        # Redis нужен только для этого режима, поэтому импортируем его здесь
+        from redis import asyncio as aioredis
+
+        self.ttl = ttl
+        self._client = aioredis.from_url(url)
+
+    async def get(self, key: str) -> Optional[dict]:
+        value = await self._client.get(key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: dict):
+        await self._client.set(key, json.dumps(value), ex=self.ttl)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class ResultCache:
+    """
+    Кэш результатов распознавания по SHA-256 содержимого изображения и версии модели
+    """
+    _backend = None
+
+    @classmethod
+    async def start(cls):
+        if cls._backend is not None:
+            return
+        if RESULT_CACHE_BACKEND == "memory":
+            cls._backend = MemoryCacheBackend(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+        elif RESULT_CACHE_BACKEND == "redis":
+            cls._backend = RedisCacheBackend(RESULT_CACHE_REDIS_URL, RESULT_CACHE_TTL)
+
+    @classmethod
+    async def stop(cls):
+        if cls._backend is not None:
+            await cls._backend.close()
+            cls._backend = None
+
+    @staticmethod
+    def make_key(sha256: str) -> str:
+        """
+        Ключ кэша по SHA-256 содержимого (hex), посчитанному при загрузке
+        """
+        return f"print-result:{MODEL_VERSION}:{sha256}"
+
+    @classmethod
+    async def get(cls, key: str) -> Optional[dict]:
+        if cls._backend is None:
+            return None
+        value = await cls._backend.get(key)
+        Metrics.inc("result_cache_hits" if value is not None else "result_cache_misses")
+        return value
+
+    @classmethod
+    async def set(cls, key: str, value: dict):
+        if cls._backend is not None:
+            await cls._backend.set(key, value)
@@ -0,0 +1,34 @@
+from functools import lru_cache
+from typing import Callable, Iterable, List, Sequence, Tuple
+
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+
+
+@lru_cache(maxsize=None)
+def row_builder(fields: Tuple[str, ...]) -> Callable[[Sequence], dict]:
+    """
+    Функция, превращающая кортеж Row в dict с ключами fields (одна на набор полей)
+    """
+    def build(row: Sequence) -> dict:
+        return dict(zip(fields, row))
+    return build
+
+
+def select_columns(model, fields: Iterable[str]):
+    """
+    SELECT только нужных колонок модели: строки приходят кортежами, без создания ORM-объектов
+    """
+    return select(*[model.__table__.c[field] for field in fields])
+
+
+def rows_to_dicts(fields: Sequence[str], rows: Iterable[Sequence]) -> List[dict]:
+    build = row_builder(tuple(fields))
+    return [build(row) for row in rows]
+
+
+def ok_response(data) -> ORJSONResponse:
+    """
+    Ответ {"message": "OK", "data": ...}, сериализуемый orjson напрямую (без jsonable_encoder)
+    """
+    return ORJSONResponse({"message": "OK", "data": data})
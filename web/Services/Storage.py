@@ -0,0 +1,80 @@
+import os
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from config import STORAGE_SHARD_DEPTH, STORAGE_SHARD_WIDTH, STORAGE_NAME_LENGTH
+
+
+class StorageBackend(ABC):
+    """
+    Интерфейс хранилища загруженных изображений
+    """
+
+    @abstractmethod
+    def store(self, temp_path: str, sha256: str, ext: str) -> Tuple[str, bool]:
+        """
+        Перемещает временный файл в хранилище. Возвращает итоговый путь
+        и признак того, что файл был создан (а не найден уже сохранённым)
+        """
+
+    @abstractmethod
+    def resolve(self, img_path: str) -> Optional[str]:
+        """
+        Возвращает фактический путь к файлу по значению Print.img_path (или None)
+        """
+
+
+class ShardedFileStorage(StorageBackend):
+    """
+    Адресация по содержимому: имя файла — префикс SHA-256, файлы разложены
+    по подпапкам из первых символов хэша, чтобы в одной папке не было сотен тысяч файлов.
+    Одинаковые изображения хранятся в одном экземпляре
+    """
+
+    def __init__(self, root: str, depth: int = STORAGE_SHARD_DEPTH, width: int = STORAGE_SHARD_WIDTH,
+                 name_length: int = STORAGE_NAME_LENGTH):
+        self.root = root
+        self.depth = depth
+        self.width = width
+        self.name_length = name_length
+
+    def shard_dir(self, name: str) -> str:
+        parts = [name[i * self.width:(i + 1) * self.width] for i in range(self.depth)]
+        return os.path.join(self.root, *parts)
+
+    def path_for(self, sha256: str, ext: str) -> str:
+        name = f"{sha256[:self.name_length]}.{ext.lower()}"
+        return os.path.join(self.shard_dir(name), name)
+
+    def store(self, temp_path: str, sha256: str, ext: str) -> Tuple[str, bool]:
+        path = self.path_for(sha256, ext)
+        # Жёсткая ссылка создаётся атомарно и не перезаписывает существующий файл:
+        # из одновременных загрузок одного изображения created=True получит только одна
+        try:
+            self._link(temp_path, path)
+        except FileExistsError:
+            # Такое изображение уже сохранено — дубликат не нужен
+            os.remove(temp_path)
+            return path, False
+        os.remove(temp_path)
+        return path, True
+
+    @staticmethod
+    def _link(temp_path: str, path: str):
+        # Временный файл уже дописан, поэтому читатели никогда не увидят недописанный файл
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.link(temp_path, path)
+        except FileNotFoundError:
+            # Пустую папку-шард мог одновременно удалить val_detect — создаём заново
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.link(temp_path, path)
+
+    def resolve(self, img_path: str) -> Optional[str]:
+        return img_path if os.path.exists(img_path) else None
+
+
+@lru_cache(maxsize=None)
+def get_storage(root: str) -> StorageBackend:
+    return ShardedFileStorage(root)
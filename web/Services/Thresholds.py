@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+import time
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import THRESHOLDS_PATH, THRESHOLDS_RELOAD_INTERVAL
+
+# Пороги по умолчанию, если файл таблицы отсутствует
+DEFAULT_THRESHOLDS = [0.00765891, 0.08482563, 0.04003922, 0.12988287, 0.01532748, 0.07293494, 0.01747844]
+
+# Ключ строки таблицы: (printer_id, quality); quality=None — для всех качеств принтера
+ThresholdKey = Tuple[Optional[int], Optional[int]]
+
+
+class ThresholdTable:
+    """
+    Скомпилированная таблица порогов: матрица [строки, классы], где строка 0 — общие пороги,
+    и словарь ключ -> номер строки. Порядок поиска: (printer_id, quality), (printer_id, None), общие
+    """
+
+    def __init__(self, default: Sequence[float], overrides: Dict[ThresholdKey, Sequence[float]] = None):
+        overrides = overrides or {}
+        self.matrix = np.array([default, *overrides.values()], dtype=np.float32)
+        self.index: Dict[Hashable, int] = {key: row for row, key in enumerate(overrides, start=1)}
+
+    @property
+    def classes(self) -> int:
+        return self.matrix.shape[1]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ThresholdTable":
+        default = data["default"]
+        classes = data.get("classes", len(default))
+        overrides = {}
+        for item in data.get("overrides", []):
+            key = (item["printer_id"], item.get("quality"))
+            overrides[key] = item["thresholds"]
+        for values in [default, *overrides.values()]:
+            if len(values) != classes:
+                raise ValueError(f"Expected {classes} thresholds, got {len(values)}")
+        return cls(default, overrides)
+
+    def row(self, key: Optional[ThresholdKey]) -> int:
+        if key is None:
+            return 0
+        row = self.index.get(key)
+        if row is None:
+            row = self.index.get((key[0], None), 0)
+        return row
+
+    def apply(self, probabilities: np.ndarray, keys: Sequence[Optional[ThresholdKey]]) -> List[List[int]]:
+        """
+        Сравнивает вероятности батча [N, классы] с порогами строк, выбранных
+        для каждого элемента, одной векторной операцией
+        """
+        rows = np.fromiter((self.row(key) for key in keys), dtype=np.intp, count=len(keys))
+        detected = probabilities > self.matrix[rows]
+        return [np.flatnonzero(item).tolist() for item in detected]
+
+
+class Thresholds:
+    """
+    Таблица порогов из THRESHOLDS_PATH. Загружается один раз и перечитывается,
+    когда меняется время модификации файла (после калибровки не нужен перезапуск)
+    """
+    _table: ThresholdTable = ThresholdTable(DEFAULT_THRESHOLDS)
+    _mtime: Optional[float] = None
+    _checked_at = 0.0
+
+    @classmethod
+    def load(cls, path: str = THRESHOLDS_PATH) -> ThresholdTable:
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            if cls._mtime is not None:
+                logging.warning(f"Thresholds file {path} is missing, keeping loaded table")
+            return cls._table
+        if mtime == cls._mtime:
+            return cls._table
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                cls._table = ThresholdTable.from_dict(json.load(f))
+            logging.info(f"Loaded thresholds from {path}: {len(cls._table.index)} overrides")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Некорректный файл (например, записанный не до конца) не должен ломать распознавание
+            logging.error(f"Failed to load thresholds from {path}: {e}")
+        cls._mtime = mtime
+        return cls._table
+
+    @classmethod
+    def table(cls) -> ThresholdTable:
+        now = time.monotonic()
+        if now - cls._checked_at >= THRESHOLDS_RELOAD_INTERVAL:
+            cls._checked_at = now
+            cls.load()
+        return cls._table
+
+    @classmethod
+    def apply(cls, probabilities: np.ndarray, keys: Sequence[Optional[ThresholdKey]]) -> List[List[int]]:
+        return cls.table().apply(probabilities, keys)
@@ -0,0 +1,93 @@
+import json
+from typing import List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+from config import TRITON_URL, TRITON_TRANSPORT, TRITON_INPUT_NAME
+
+# Заголовок расширения binary-data: длина JSON-части тела запроса/ответа
+HEADER_CONTENT_LENGTH = "Inference-Header-Content-Length"
+
+# Соответствие типов KServe v2 и numpy
+DATATYPES = {
+    "BOOL": np.bool_,
+    "UINT8": np.uint8,
+    "INT8": np.int8,
+    "INT16": np.int16,
+    "INT32": np.int32,
+    "INT64": np.int64,
+    "FP16": np.float16,
+    "FP32": np.float32,
+    "FP64": np.float64,
+}
+
+
+class TritonClient:
+    @staticmethod
+    def build_request(tensor: np.ndarray, binary: bool = True) -> Tuple[bytes, dict]:
+        """
+        Формирует тело и заголовки запроса к Triton:
+        - binary: JSON-заголовок, за которым следуют сырые байты FP32
+        - json: тензор передаётся списком чисел
+        """
+        tensor = np.ascontiguousarray(tensor, dtype=np.float32)
+        input_spec = {
+            "name": TRITON_INPUT_NAME,
+            "shape": list(tensor.shape),
+            "datatype": "FP32",
+        }
+
+        if not binary:
+            input_spec["data"] = tensor.ravel().tolist()
+            body = json.dumps({"inputs": [input_spec]}).encode()
+            return body, {"Content-Type": "application/json"}
+
+        raw = tensor.tobytes()
+        input_spec["parameters"] = {"binary_data_size": len(raw)}
+        header = json.dumps({
+            "inputs": [input_spec],
+            # Просим вернуть все выходы в бинарном виде
+            "parameters": {"binary_data_output": True},
+        }).encode()
+        headers = {
+            "Content-Type": "application/octet-stream",
+            HEADER_CONTENT_LENGTH: str(len(header)),
+        }
+        return header + raw, headers
+
+    @staticmethod
+    def parse_response(body: bytes, header_length: Optional[str] = None) -> List[np.ndarray]:
+        """
+        Разбирает ответ Triton в список numpy-массивов (по одному на каждый выход).
+        Поддерживает как JSON-ответ, так и ответ с бинарными выходами
+        """
+        json_length = int(header_length) if header_length else len(body)
+        result = json.loads(body[:json_length])
+
+        outputs = []
+        offset = json_length
+        for output in result["outputs"]:
+            dtype = DATATYPES.get(output.get("datatype"), np.float32)
+            size = output.get("parameters", {}).get("binary_data_size")
+            if size is not None:
+                array = np.frombuffer(body, dtype=dtype, count=size // np.dtype(dtype).itemsize, offset=offset)
+                offset += size
+            else:
+                array = np.asarray(output["data"], dtype=dtype)
+            outputs.append(array.reshape(output["shape"]))
+        return outputs
+
+    @staticmethod
+    async def infer(session: aiohttp.ClientSession, tensor: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Отправляет тензор в Triton и возвращает первый выход модели.
+        Возвращает None, если сервер ответил ошибкой
+        """
+        body, headers = TritonClient.build_request(tensor, binary=TRITON_TRANSPORT == "binary")
+        async with session.post(TRITON_URL, data=body, headers=headers) as response:
+            if response.status != 200:
+                return None
+            content = await response.read()
+            outputs = TritonClient.parse_response(content, response.headers.get(HEADER_CONTENT_LENGTH))
+            return outputs[0]
@@ -0,0 +1,134 @@
+import asyncio
+import itertools
+import logging
+from typing import AsyncIterator, Dict, Optional
+
+import numpy as np
+
+from config import TRITON_INPUT_NAME
+from Services.TritonClient import DATATYPES
+
+
+class TritonGrpcClient:
+    """
+    Клиент Triton по gRPC (протокол KServe v2) с постоянным каналом.
+    Тензоры передаются в raw_input_contents без преобразования в списки чисел.
+    В потоковом режиме все батчи процесса идут через один двунаправленный
+    поток ModelStreamInfer, а ответы сопоставляются с запросами по id
+    """
+
+    def __init__(self, url: str, model_name: str, streaming: bool, keepalive_ms: int, timeout: float):
+        # grpc и описания сервиса из tritonclient нужны только для этого режима,
+        # поэтому импортируем их здесь
+        try:
+            import grpc
+            from tritonclient.grpc import service_pb2, service_pb2_grpc
+        except ImportError as e:
+            raise RuntimeError(
+                "INFERENCE_BACKEND=triton_grpc requires tritonclient[grpc]: "
+                "pip install -r requirements-triton-grpc.txt or build the image with INFERENCE_EXTRAS=triton-grpc"
+            ) from e
+
+        self._grpc = grpc
+        self._pb2 = service_pb2
+        self._channel = grpc.aio.insecure_channel(url, options=[
+            ("grpc.max_send_message_length", -1),
+            ("grpc.max_receive_message_length", -1),
+            ("grpc.keepalive_time_ms", keepalive_ms),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.max_pings_without_data", 0),
+        ])
+        self._stub = service_pb2_grpc.GRPCInferenceServiceStub(self._channel)
+        self._model_name = model_name
+        self._streaming = streaming
+        self._timeout = timeout
+
+        self._ids = itertools.count()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._requests: Optional[asyncio.Queue] = None
+        self._stream_task: Optional[asyncio.Task] = None
+
+    def _make_request(self, tensor: np.ndarray, request_id: str = ""):
+        tensor = np.ascontiguousarray(tensor, dtype=np.float32)
+        return self._pb2.ModelInferRequest(
+            model_name=self._model_name,
+            id=request_id,
+            inputs=[self._pb2.ModelInferRequest.InferInputTensor(
+                name=TRITON_INPUT_NAME, datatype="FP32", shape=list(tensor.shape)
+            )],
+            raw_input_contents=[tensor.tobytes()],
+        )
+
+    @staticmethod
+    def _first_output(response) -> np.ndarray:
+        output = response.outputs[0]
+        dtype = DATATYPES.get(output.datatype, np.float32)
+        return np.frombuffer(response.raw_output_contents[0], dtype=dtype).reshape(list(output.shape))
+
+    async def infer(self, tensor: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Отправляет тензор в Triton и возвращает первый выход модели.
+        Возвращает None, если сервер ответил ошибкой
+        """
+        if self._streaming:
+            return await self._stream_infer(tensor)
+
+        try:
+            response = await self._stub.ModelInfer(self._make_request(tensor), timeout=self._timeout)
+        except self._grpc.aio.AioRpcError as e:
+            logging.warning(f"Triton gRPC inference failed: {e.code().name} {e.details()}")
+            return None
+        return self._first_output(response)
+
+    async def _stream_infer(self, tensor: np.ndarray) -> Optional[np.ndarray]:
+        self._ensure_stream()
+        request_id = str(next(self._ids))
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        await self._requests.put(self._make_request(tensor, request_id))
+        try:
+            return await asyncio.wait_for(future, self._timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Triton gRPC stream request {request_id} timed out")
+            return None
+        finally:
+            self._pending.pop(request_id, None)
+
+    def _ensure_stream(self):
+        if self._stream_task is None or self._stream_task.done():
+            self._requests = asyncio.Queue()
+            self._stream_task = asyncio.create_task(self._run_stream(self._requests))
+
+    @staticmethod
+    async def _iterate(queue: asyncio.Queue) -> AsyncIterator:
+        while True:
+            yield await queue.get()
+
+    async def _run_stream(self, queue: asyncio.Queue):
+        try:
+            async for response in self._stub.ModelStreamInfer(self._iterate(queue)):
+                request_id = response.infer_response.id
+                if response.error_message:
+                    logging.warning(f"Triton gRPC stream request {request_id or '?'} failed: {response.error_message}")
+                    value = None
+                else:
+                    value = self._first_output(response.infer_response)
+                future = self._pending.get(request_id)
+                if future is not None and not future.done():
+                    future.set_result(value)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"Triton gRPC stream closed: {e}")
+        finally:
+            # Поток закрыт: ожидающие запросы получают ошибку, следующий вызов откроет новый поток
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_result(None)
+
+    async def close(self):
+        if self._stream_task is not None:
+            self._stream_task.cancel()
+            await asyncio.gather(self._stream_task, return_exceptions=True)
+            self._stream_task = None
+        await self._channel.close()
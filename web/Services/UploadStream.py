@@ -0,0 +1,47 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+
+from config import MAX_UPLOAD_SIZE, UPLOAD_CHUNK_SIZE
+
+
+@dataclass
+class StoredUpload:
+    path: str  # Временный файл с содержимым загрузки
+    sha256: str  # SHA-256 содержимого (hex)
+    size: int
+
+
+class UploadStream:
+    @staticmethod
+    async def save(img: UploadFile, folder: str) -> StoredUpload:
+        """
+        Потоково записывает загрузку во временный файл в папке folder,
+        попутно считая SHA-256 и проверяя ограничение размера.
+        Файл целиком в памяти не держится
+        """
+        # Если размер известен заранее, отказываем до чтения данных
+        if img.size is not None and img.size > MAX_UPLOAD_SIZE:
+            raise HTTPException(status_code=413, detail="Image is too large")
+
+        path = os.path.join(folder, f".upload-{uuid.uuid4().hex}.tmp")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(path, 'wb') as f:
+                while chunk := await img.read(UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > MAX_UPLOAD_SIZE:
+                        raise HTTPException(status_code=413, detail="Image is too large")
+                    digest.update(chunk)
+                    await f.write(chunk)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+
+        return StoredUpload(path=path, sha256=digest.hexdigest(), size=size)
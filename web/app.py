@@ -1,21 +1,32 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, UploadFile, File, Depends, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Depends, Form, HTTPException, Query, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, text
 import uvicorn
 from Controllers.PrinterController import PrinterController
 from Controllers.PrintController import PrintController
 from Models.Printer import Printer
 from Models.Print import Print
-from database import DataBase, AsyncSessionLocal, engine, get_db  # Импорт необходимых объектов для работы с БД
+from database import DataBase, AsyncSessionLocal, engine, get_db, DATABASE_URL  # Импорт необходимых объектов для работы с БД
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from typing import Optional
 from contextlib import asynccontextmanager
 from Controllers.FeedbackController import FeedbackController
+from Services.HttpClient import HttpClient
+from Services.InferenceBatcher import InferenceBatcher
+from Services.InferenceBackend import InferenceBackend
+from Services.Thresholds import Thresholds
+from Services.PreprocessPool import PreprocessPool
+from Services.Metrics import Metrics
+from Services.ResultCache import ResultCache
+from Services.PrinterCatalog import PrinterCatalog
+from Services.PrinterValidation import PrinterCreate
+from Services.JobWorker import JobWorker
+from Models.InferenceJob import InferenceJob
+from config import UPLOAD_FOLDER
 
-# Определяем папку для загрузки файлов
-UPLOAD_FOLDER = '/uploads'
 
 # Функция жизненного цикла приложения
 @asynccontextmanager
@@ -23,6 +34,16 @@ async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         # Создание всех таблиц в БД, если их нет
         await conn.run_sync(DataBase.metadata.create_all)
+        # Индексы, добавленные после создания таблицы print (create_all их не создаёт)
+        for index in Print.__table__.indexes:
+            await conn.run_sync(index.create, checkfirst=True)
+        # Столбец, добавленный после создания таблицы inference_job (create_all его не добавляет)
+        await conn.execute(text(
+            "ALTER TABLE inference_job ADD COLUMN IF NOT EXISTS "
+            "available_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()"
+        ))
+        for index in InferenceJob.__table__.indexes:
+            await conn.run_sync(index.create, checkfirst=True)
 
     async with AsyncSessionLocal() as session:
         # Проверяем, есть ли принтеры в БД, если нет — создаем стандартные
@@ -31,8 +52,33 @@ async def lifespan(app: FastAPI):
             await PrinterController.create_default_printers(session)
         await session.commit()
 
+    # Сброс кэша каталога принтеров по уведомлениям из других воркеров
+    await PrinterCatalog.start(DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://"))
+
+    # Общая сессия для исходящих запросов (Triton и другие сервисы)
+    await HttpClient.start()
+    # Пул для декодирования и предобработки изображений
+    await PreprocessPool.start()
+    # Кэш результатов для повторно загружаемых изображений
+    await ResultCache.start()
+    # Бэкенд инференса (Triton или ONNX Runtime, см. INFERENCE_BACKEND)
+    await InferenceBackend.start()
+    # Таблица порогов классов дефектов (перечитывается при изменении файла)
+    Thresholds.load()
+    # Очередь динамического батчинга запросов к модели
+    await InferenceBatcher.start(PrintController.infer_batch)
+    # Обработчики очереди асинхронных заданий распознавания
+    await JobWorker.start()
+
     yield  # Пауза в контексте жизненного цикла (ожидание завершения работы приложения)
 
+    await JobWorker.stop()
+    await InferenceBatcher.stop()
+    await InferenceBackend.stop()
+    await PreprocessPool.stop()
+    await ResultCache.stop()
+    await PrinterCatalog.stop()
+    await HttpClient.close()
     await engine.dispose()  # Закрываем соединение с БД при завершении работы
 
 # Создаем экземпляр FastAPI с указанным жизненным циклом
@@ -62,27 +108,55 @@ async def add_csp_header(request, call_next):
 
 # =================== Роуты для работы с принтерами ===================
 
-# Получение списка всех принтеров
+# Получение списка всех принтеров (кэшируется, поддерживает If-None-Match)
 @app.get("/api/printers/")
-async def get_printers(session: AsyncSession = Depends(get_db)):
-    return await PrinterController.get_printers(session)
+async def get_printers(
+    session: AsyncSession = Depends(get_db),
+    if_none_match: Optional[str] = Header(None)
+):
+    return await PrinterController.get_printers(session, if_none_match)
 
 # Добавление нового принтера
 @app.post("/api/printers/")
-async def add_printer(printer_data: dict, session: AsyncSession = Depends(get_db)):
+async def add_printer(printer_data: PrinterCreate, session: AsyncSession = Depends(get_db)):
     return await PrinterController.add_printer(session, printer_data)
 
+# Массовый импорт принтеров (CSV или JSON Lines, обновление по name)
+@app.post("/api/printers/bulk")
+async def bulk_import_printers(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),  # По умолчанию определяется по Content-Type
+    session: AsyncSession = Depends(get_db)
+):
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "jsonl")
+    return await PrinterController.bulk_import(session, await request.body(), fmt)
+
 # Получение информации о конкретном принтере по его ID
 @app.get("/api/printers/{item_id}")
-async def get_printer(item_id: int, session: AsyncSession = Depends(get_db)):
-    return await PrinterController.get_printer(session, item_id)
+async def get_printer(
+    item_id: int,
+    session: AsyncSession = Depends(get_db),
+    if_none_match: Optional[str] = Header(None)
+):
+    return await PrinterController.get_printer(session, item_id, if_none_match)
 
 # =================== Роуты для работы с печатями ===================
 
-# Получение списка всех печатей
+# Получение списка печатей (постранично, с фильтрами и выбором полей)
 @app.get("/api/prints/")
-async def get_prints(session: AsyncSession = Depends(get_db)):
-    return await PrintController.get_prints(session)
+async def get_prints(
+    session: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = None,  # Токен next_cursor из предыдущего ответа
+    limit: int = Query(100, ge=1, le=1000),  # Размер страницы
+    printer_id: Optional[int] = None,  # Фильтр по принтеру
+    quality: Optional[int] = None,  # Фильтр по качеству
+    defect: Optional[int] = None,  # Фильтр по классу дефекта
+    fields: Optional[str] = None  # Возвращаемые поля через запятую
+):
+    return await PrintController.get_prints(
+        session, cursor=cursor, limit=limit, printer_id=printer_id,
+        quality=quality, defect=defect, fields=fields
+    )
 
 # Добавление новой печати
 @app.post("/api/prints/")
@@ -90,22 +164,40 @@ async def add_print(
     session: AsyncSession = Depends(get_db),
     img: UploadFile = File(...),  # Ожидаем, что файл будет передан через форму
     printer_id: int = Form(...),  # Ожидаем, что ID принтера будет передан через форму
-    quality: int = Form(...)  # Ожидаем, что качество будет передано через форму
+    quality: int = Form(...),  # Ожидаем, что качество будет передано через форму
+    async_mode: bool = Query(False, alias="async")  # ?async=1 — вернуть 202 с id задания
 ):
     return await PrintController.add_print(
         img=img,  # Передаем файл
         printer_id=printer_id,  # Передаем ID принтера
         quality=quality,  # Передаем качество
         session=session,  # Передаем сессию базы данных
-        upload_folder = UPLOAD_FOLDER
+        upload_folder = UPLOAD_FOLDER,
+        async_mode=async_mode  # Асинхронный режим через очередь заданий
     )
 
+# Состояние асинхронного задания распознавания (wait — long-poll в секундах)
+@app.get("/api/prints/jobs/{job_id}")
+async def get_print_job(
+    job_id: str,
+    wait: float = Query(0, ge=0),
+    session: AsyncSession = Depends(get_db)
+):
+    return await PrintController.get_job(session, job_id, wait)
+
 
 # Получение информации о конкретной печати по её ID
 @app.get("/api/prints/{item_id}")
 async def get_print(item_id: int, session: AsyncSession = Depends(get_db)):
     return await PrintController.get_print(session, item_id)
 
+# =================== Метрики ===================
+
+# Счётчики и замеры времени текущего воркера (очередь предобработки и т.д.)
+@app.get("/api/metrics/")
+async def get_metrics():
+    return {"message": "OK", "data": Metrics.snapshot()}
+
 # =================== Роуты для работы с отзывами ===================
 
 # Модель запроса для отправки отзыва
@@ -0,0 +1,75 @@
+"""
+Нагрузочный тест настроек движка БД: прежние параметры (echo=True, пул по умолчанию)
+против ENGINE_OPTIONS из database.py (переменные окружения DB_*).
+
+Запуск из папки web против работающей базы (например, в контейнере web):
+    python -m benchmarks.db_load [--url postgresql+asyncpg://...] [--concurrency 50] [--seconds 10]
+В прежнем режиме каждый запрос логируется в stdout; итоговые строки печатаются в stderr,
+поэтому stdout можно отбросить: python -m benchmarks.db_load > /dev/null
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import DATABASE_URL, ENGINE_OPTIONS
+from Controllers.PrintController import PRINT_FIELDS
+from Models.Print import Print
+from Models.Printer import Printer, PRINTER_FIELDS
+from Services.Serialization import select_columns
+
+
+async def request(session_factory):
+    """
+    Типичная пара запросов чтения: принтер по id и страница печатей
+    """
+    async with session_factory() as session:
+        await session.execute(select_columns(Printer, PRINTER_FIELDS).where(Printer.id == 1))
+        await session.execute(select_columns(Print, PRINT_FIELDS).order_by(Print.id).limit(100))
+
+
+async def worker(session_factory, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            await request(session_factory)
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(e)
+
+
+async def run(name: str, url: str, options: dict, concurrency: int, seconds: float):
+    engine = create_async_engine(url, **options)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    # Прогрев пула и кэшей
+    await asyncio.gather(*(request(session_factory) for _ in range(concurrency)), return_exceptions=True)
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(worker(session_factory, deadline, latencies, errors) for _ in range(concurrency)))
+    await engine.dispose()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    print(f"{name:>7}: {len(latencies) / seconds:8.1f} req/s, p50 {p50:6.1f} ms, p99 {p99:6.1f} ms, "
+          f"errors {len(errors)}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    legacy_options = {"echo": True}
+    asyncio.run(run("legacy", args.url, legacy_options, args.concurrency, args.seconds))
+    asyncio.run(run("tuned", args.url, ENGINE_OPTIONS, args.concurrency, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
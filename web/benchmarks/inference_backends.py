@@ -0,0 +1,112 @@
+"""
+Сравнение бэкендов инференса: Triton (HTTP или gRPC) и ONNX Runtime на CPU внутри процесса.
+Для каждого размера батча печатает p50/p99 задержки вызова, пропускную способность
+и число изображений на секунду процессорного времени (img/cpu-s, «на ядро»).
+Для Triton учитывается только CPU клиента, время сервера сюда не входит.
+
+Запуск из папки web:
+    python -m benchmarks.inference_backends --backends onnx --onnx-model model.onnx --intra-threads 4
+    python -m benchmarks.inference_backends --backends triton,triton_grpc,onnx --batch-sizes 1,4,8 --concurrency 2
+Адреса Triton берутся из TRITON_URL и TRITON_GRPC_URL (можно указать заглушку
+triton_inference_server/mock), режим gRPC — из TRITON_GRPC_STREAMING.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from config import (
+    ONNX_MODEL_PATH,
+    ONNX_INTRA_OP_THREADS,
+    ONNX_INTER_OP_THREADS,
+    TRITON_GRPC_URL,
+    TRITON_MODEL_NAME,
+    TRITON_GRPC_STREAMING,
+    TRITON_GRPC_KEEPALIVE_MS,
+    TRITON_GRPC_TIMEOUT,
+)
+from Services.HttpClient import HttpClient
+from Services.InferenceBackend import OnnxRuntimeBackend, TritonBackend, TritonGrpcBackend
+from Services.Preprocessing import INPUT_SIZE
+
+
+async def worker(backend, batch: np.ndarray, deadline: float, latencies: list, failures: list):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            output = await backend.infer(batch)
+        except Exception:
+            output = None
+        if output is None:
+            failures.append(1)
+        else:
+            latencies.append(time.perf_counter() - started)
+
+
+async def measure(backend, batch_size: int, concurrency: int, seconds: float) -> dict:
+    batch = np.random.default_rng(0).standard_normal((batch_size, 3, *INPUT_SIZE), dtype=np.float32)
+    # Прогрев: первые вызовы ONNX Runtime выделяют память и подбирают ядра
+    for _ in range(2):
+        await backend.infer(batch)
+
+    latencies, failures = [], []
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    deadline = started + seconds
+    await asyncio.gather(*(worker(backend, batch, deadline, latencies, failures) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    cpu_seconds = time.process_time() - cpu_started
+
+    images = len(latencies) * batch_size
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99]) if latencies else (float("nan"),) * 2
+    return {
+        "p50": p50,
+        "p99": p99,
+        "throughput": images / elapsed,
+        "per_core": images / cpu_seconds if cpu_seconds else float("nan"),
+        "failures": len(failures),
+    }
+
+
+async def main(args):
+    backends = []
+    for name in args.backends.split(","):
+        if name == "triton":
+            await HttpClient.start()
+            backends.append(TritonBackend())
+        elif name == "triton_grpc":
+            backends.append(TritonGrpcBackend(
+                TRITON_GRPC_URL, TRITON_MODEL_NAME, TRITON_GRPC_STREAMING, TRITON_GRPC_KEEPALIVE_MS, TRITON_GRPC_TIMEOUT
+            ))
+        elif name == "onnx":
+            backends.append(OnnxRuntimeBackend(args.onnx_model, args.intra_threads, args.inter_threads, args.concurrency))
+        else:
+            raise SystemExit(f"Unknown backend: {name}")
+
+    print(f"cpu_count={os.cpu_count()} concurrency={args.concurrency} "
+          f"onnx intra/inter threads={args.intra_threads}/{args.inter_threads}")
+    print(f"{'backend':<12} {'batch':>5} {'p50 ms':>9} {'p99 ms':>9} {'img/s':>8} {'img/cpu-s':>10} {'errors':>7}")
+    try:
+        for backend in backends:
+            for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+                result = await measure(backend, batch_size, args.concurrency, args.seconds)
+                print(f"{backend.name:<12} {batch_size:>5} {result['p50']:>9.1f} {result['p99']:>9.1f} "
+                      f"{result['throughput']:>8.1f} {result['per_core']:>10.1f} {result['failures']:>7}")
+    finally:
+        for backend in backends:
+            await backend.close()
+        await HttpClient.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", default="triton,onnx")
+    parser.add_argument("--batch-sizes", default="1,4,8")
+    parser.add_argument("--concurrency", type=int, default=1, help="Одновременных вызовов infer")
+    parser.add_argument("--seconds", type=float, default=10, help="Длительность замера на каждый размер батча")
+    parser.add_argument("--onnx-model", default=ONNX_MODEL_PATH)
+    parser.add_argument("--intra-threads", type=int, default=ONNX_INTRA_OP_THREADS)
+    parser.add_argument("--inter-threads", type=int, default=ONNX_INTER_OP_THREADS)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,73 @@
+"""
+Пропускная способность пути инференса веб-сервиса (InferenceBatcher -> InferenceBackend)
+без базы данных и загрузки файлов.
+
+Запуск из папки web против заглушки Triton (triton_inference_server/mock/server.py)
+или настоящего сервера:
+    python ../triton_inference_server/mock/server.py --port 8010 --latency const:20 &
+    TRITON_URL=http://localhost:8010/v2/models/defect_detection_model/infer \\
+        python -m benchmarks.inference_throughput --concurrency 32 --seconds 10
+Сравнить режимы можно переменными BATCH_ENABLED, BATCH_MAX_SIZE, TRITON_TRANSPORT, INFERENCE_BACKEND.
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from config import BATCH_ENABLED, BATCH_MAX_SIZE, INFERENCE_BACKEND, TRITON_TRANSPORT, TRITON_URL
+from Controllers.PrintController import PrintController
+from Services.HttpClient import HttpClient
+from Services.InferenceBackend import InferenceBackend
+from Services.InferenceBatcher import InferenceBatcher
+from Services.Preprocessing import INPUT_SIZE
+
+
+async def worker(images, deadline: float, latencies: list, failures: list):
+    i = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            result = await InferenceBatcher.submit(images[i % len(images)])
+            if result is None:
+                failures.append("triton error")
+            else:
+                latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            failures.append(str(e))
+        i += 1
+
+
+async def main(args):
+    rng = np.random.default_rng(0)
+    images = [rng.standard_normal((3, *INPUT_SIZE), dtype=np.float32) for _ in range(args.images)]
+
+    await HttpClient.start()
+    await InferenceBackend.start()
+    await InferenceBatcher.start(PrintController.infer_batch)
+    try:
+        # Прогрев соединений
+        await InferenceBatcher.submit(images[0])
+        latencies, failures = [], []
+        started = time.perf_counter()
+        deadline = started + args.seconds
+        await asyncio.gather(*(worker(images, deadline, latencies, failures) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await InferenceBatcher.stop()
+        await InferenceBackend.stop()
+        await HttpClient.close()
+
+    print(f"backend={INFERENCE_BACKEND} url={TRITON_URL} transport={TRITON_TRANSPORT} batching={BATCH_ENABLED} max_batch={BATCH_MAX_SIZE}")
+    print(f"concurrency={args.concurrency}: {len(latencies) / elapsed:.1f} img/s, errors={len(failures)}")
+    if latencies:
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        print(f"latency ms: p50={p50:.1f} p95={p95:.1f} p99={p99:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--images", type=int, default=16, help="Число различных входных тензоров")
+    asyncio.run(main(parser.parse_args()))
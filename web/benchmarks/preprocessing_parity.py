@@ -0,0 +1,96 @@
+"""
+Сверка NumPy/Pillow-предобработки (Services/Preprocessing.py) с прежним
+конвейером torchvision и сравнение скорости.
+
+Запуск из папки web (нужен torchvision, в образ сервиса он не входит):
+    python -m benchmarks.preprocessing_parity
+"""
+import io
+import time
+
+import numpy as np
+from PIL import Image
+from torchvision import transforms
+
+import Services.Preprocessing as preprocessing
+
+# Допустимое расхождение с torchvision (в нормализованных единицах)
+MAX_ABS_TOLERANCE = 1e-4
+# С Image.draft (PREPROCESS_JPEG_DRAFT, по умолчанию выключен) JPEG уменьшается при декодировании,
+# поэтому для этого режима сравниваем среднее отклонение
+DRAFT_MEAN_ABS_TOLERANCE = 0.05
+
+REPEATS = 20
+
+reference_transform = transforms.Compose([
+    transforms.Resize((500, 500)),
+    transforms.ToTensor(),
+    transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+])
+
+
+def reference_preprocess(content: bytes) -> np.ndarray:
+    image = Image.open(io.BytesIO(content)).convert("RGB")
+    return reference_transform(image).numpy()
+
+
+def make_image(width: int, height: int, fmt: str, seed: int) -> bytes:
+    """
+    Синтетическое «фото»: плавные градиенты с шумом
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    channels = [
+        127 + 100 * np.sin(x / (37 + 11 * c) + y / (53 + 7 * c) + c) + rng.normal(0, 12, (height, width))
+        for c in range(3)
+    ]
+    pixels = np.clip(np.stack(channels, axis=-1), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=fmt, quality=90)
+    return buffer.getvalue()
+
+
+def measure(fn, content: bytes) -> float:
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(content)
+    return (time.perf_counter() - started) / REPEATS * 1000
+
+
+def main():
+    samples = [
+        ("png 640x480", make_image(640, 480, "PNG", 0)),
+        ("jpeg 500x500", make_image(500, 500, "JPEG", 1)),
+        ("jpeg 1280x960", make_image(1280, 960, "JPEG", 2)),
+        ("jpeg 4032x3024", make_image(4032, 3024, "JPEG", 3)),
+    ]
+
+    failed = False
+    for name, content in samples:
+        expected = reference_preprocess(content)
+
+        preprocessing.PREPROCESS_JPEG_DRAFT = False
+        exact = preprocessing.preprocess_image(content)
+        exact_diff = float(np.abs(exact - expected).max())
+        exact_ms = measure(preprocessing.preprocess_image, content)
+
+        preprocessing.PREPROCESS_JPEG_DRAFT = True
+        drafted = preprocessing.preprocess_image(content)
+        draft_diff = float(np.abs(drafted - expected).mean())
+        draft_ms = measure(preprocessing.preprocess_image, content)
+
+        reference_ms = measure(reference_preprocess, content)
+
+        ok = (exact.shape == expected.shape and exact.dtype == np.float32
+              and exact_diff <= MAX_ABS_TOLERANCE and draft_diff <= DRAFT_MEAN_ABS_TOLERANCE)
+        failed = failed or not ok
+        print(f"{name:>15}: max|diff| {exact_diff:.2e}, draft mean|diff| {draft_diff:.4f} | "
+              f"torchvision {reference_ms:.1f} ms, numpy {exact_ms:.1f} ms, numpy+draft {draft_ms:.1f} ms"
+              f" {'OK' if ok else 'FAIL'}")
+
+    if failed:
+        raise SystemExit("Preprocessing output differs from torchvision beyond tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Пропускная способность валидации данных принтера:
+прежнее ручное приведение типов из add_printer против модели PrinterCreate,
+для одиночных запросов и для массового импорта.
+
+Запуск из папки web:
+    python -m benchmarks.printer_validation [--rows 10000]
+"""
+import argparse
+import time
+
+from Services.PrinterValidation import PrinterCreate, validate_printers
+from Services.PrinterImport import validate_rows
+from benchmarks.serialization import make_printer_row
+from Models.Printer import PRINTER_FIELDS
+
+# Поля, которые прежний add_printer приводил вручную
+LEGACY_FLOATS = ("val_print_x", "val_print_y", "val_print_z", "min_x_head", "min_y_head", "max_x_head",
+                 "max_y_head", "height_portal", "extr_1_nozzle_diameter", "extr_1_filament_diameter",
+                 "extr_1_nozzle_displacement_x", "extr_1_nozzle_displacement_y", "extr_2_nozzle_diameter",
+                 "extr_2_filament_diameter", "extr_2_nozzle_displacement_x", "extr_2_nozzle_displacement_y")
+LEGACY_BOOLS = ("center_origin", "table_heating", "print_volume_heating", "displace_extruder")
+
+
+def legacy_coerce(printer_data: dict) -> dict:
+    printer_dict = printer_data.copy()
+    for field in LEGACY_FLOATS:
+        if printer_dict.get(field) is not None:
+            printer_dict[field] = float(printer_dict[field])
+    for field in LEGACY_BOOLS:
+        if printer_dict.get(field) is not None:
+            printer_dict[field] = bool(printer_dict[field])
+    if printer_dict.get("count_extruder") is not None:
+        printer_dict["count_extruder"] = int(printer_dict["count_extruder"])
+    return printer_dict
+
+
+def make_payload(i: int) -> dict:
+    # Как приходит от партнёров: числа строками
+    payload = dict(zip(PRINTER_FIELDS, make_printer_row(i)))
+    del payload["id"]
+    return {key: str(value) if isinstance(value, float) else value for key, value in payload.items()}
+
+
+def rate(fn, count: int) -> float:
+    started = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    payloads = [make_payload(i) for i in range(args.rows)]
+
+    def legacy_single():
+        for payload in payloads:
+            legacy_coerce(payload)
+
+    def model_single():
+        for payload in payloads:
+            PrinterCreate.model_validate(payload)
+
+    print(f"single payloads ({args.rows}):")
+    print(f"  legacy hand coercion   {rate(legacy_single, args.rows):>10,.0f} rows/s (no validation)")
+    print(f"  PrinterCreate          {rate(model_single, args.rows):>10,.0f} rows/s")
+
+    print(f"bulk payload ({args.rows} rows):")
+    print(f"  validate_printers      {rate(lambda: validate_printers(payloads), args.rows):>10,.0f} rows/s")
+    print(f"  validate_rows + COPY   {rate(lambda: validate_rows(payloads), args.rows):>10,.0f} rows/s")
+
+    broken = [dict(payload, val_print_x="n/a") if i % 10 == 0 else payload for i, payload in enumerate(payloads)]
+    print(f"  with 10% invalid rows  {rate(lambda: validate_printers(broken), args.rows):>10,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Сравнение сериализации ответов: marshmallow (PrinterSchema/PrintSchema по ORM-объектам)
+против построения dict из кортежей Row (Services/Serialization.py) + orjson.
+
+Запуск из папки web:
+    python -m benchmarks.serialization [--printers 10000] [--prints 100000]
+"""
+import argparse
+import json
+import time
+
+import orjson
+
+from Controllers.PrintController import PRINT_FIELDS
+from Models.Printer import Printer, PrinterSchema, PRINTER_FIELDS
+from Models.Print import Print, PrintSchema
+from Services.Serialization import rows_to_dicts
+
+
+def make_printer_row(i: int) -> tuple:
+    values = []
+    for column in Printer.__table__.columns:
+        python_type = column.type.python_type
+        if column.name == "id":
+            values.append(i)
+        elif python_type is float:
+            values.append(i * 0.5)
+        elif python_type is bool:
+            values.append(i % 2 == 0)
+        elif python_type is int:
+            values.append(i % 4)
+        else:
+            values.append(f"{column.name}-{i}")
+    return tuple(values)
+
+
+def make_print_row(i: int) -> tuple:
+    return i, i % 50 + 1, [i % 7, (i + 3) % 7], f"/uploads/ab/cd/{i:032x}.jpg", i % 3 + 1
+
+
+def to_orm(model, fields, row):
+    values = dict(zip(fields, row))
+    item_id = values.pop("id")
+    instance = model(**values)
+    instance.id = item_id
+    return instance
+
+
+def measure(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def compare(name, model, schema, fields, rows):
+    objects = [to_orm(model, fields, row) for row in rows]
+
+    def legacy():
+        # Как раньше: схема на каждый запрос, dump ORM-объектов, стандартный json
+        json.dumps({"message": "OK", "data": schema(many=True).dump(objects)})
+
+    def fast():
+        orjson.dumps({"message": "OK", "data": rows_to_dicts(fields, rows)})
+
+    assert schema(many=True).dump(objects) == rows_to_dicts(fields, rows), "outputs differ"
+    legacy_ms = min(measure(legacy) for _ in range(3))
+    fast_ms = min(measure(fast) for _ in range(3))
+    print(f"{name:>16}: marshmallow+json {legacy_ms:8.1f} ms, row builder+orjson {fast_ms:7.1f} ms "
+          f"(x{legacy_ms / fast_ms:.1f})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--printers", type=int, default=10_000)
+    parser.add_argument("--prints", type=int, default=100_000)
+    args = parser.parse_args()
+
+    compare(f"{args.printers} printers", Printer, PrinterSchema, PRINTER_FIELDS,
+            [make_printer_row(i) for i in range(1, args.printers + 1)])
+    compare(f"{args.prints} prints", Print, PrintSchema, PRINT_FIELDS,
+            [make_print_row(i) for i in range(1, args.prints + 1)])
+
+
+if __name__ == "__main__":
+    main()
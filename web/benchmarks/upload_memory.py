@@ -0,0 +1,113 @@
+"""
+Пиковое потребление памяти (RSS) при одновременной загрузке изображений:
+прежняя обработка (await img.read() + BytesIO) против потоковой (UploadStream).
+
+Запуск из папки web:
+    python -m benchmarks.upload_memory [--uploads 50] [--size-mb 10]
+Каждый режим выполняется в отдельном процессе, чтобы пики RSS не смешивались.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import aiofiles
+import numpy as np
+from fastapi import UploadFile
+from PIL import Image
+
+from Services.Preprocessing import preprocess_image
+from Services.PreprocessPool import PreprocessPool
+from Services.UploadStream import UploadStream
+
+# Имитация ожидания ответа Triton, пока запрос держит свои данные
+INFERENCE_DELAY = 0.2
+
+
+def make_jpeg(path: str, size_mb: float):
+    """
+    Шумное изображение — JPEG почти не сжимает его, поэтому размер файла
+    подбирается площадью картинки
+    """
+    side = int((size_mb * 1024 * 1024 / 3 * 2.6) ** 0.5)
+    pixels = np.random.default_rng(0).integers(0, 256, (side, side, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path, format="JPEG", quality=95)
+
+
+def make_upload(source_path: str) -> UploadFile:
+    """
+    UploadFile в том виде, в каком его отдаёт Starlette: содержимое в SpooledTemporaryFile
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    with open(source_path, "rb") as f:
+        shutil.copyfileobj(f, spooled)
+    size = spooled.tell()
+    spooled.seek(0)
+    return UploadFile(file=spooled, size=size, filename="photo.jpg")
+
+
+async def legacy_upload(img: UploadFile, folder: str, index: int):
+    filepath = os.path.join(folder, f"legacy_{index}.jpg")
+    async with aiofiles.open(filepath, 'wb') as f:
+        content = await img.read()
+        await f.write(content)
+    image = preprocess_image(content)
+    await asyncio.sleep(INFERENCE_DELAY)
+    return image.shape, len(content)
+
+
+async def streaming_upload(img: UploadFile, folder: str, index: int):
+    upload = await UploadStream.save(img, folder)
+    filepath = os.path.join(folder, f"stream_{index}.jpg")
+    os.replace(upload.path, filepath)
+    image = await PreprocessPool.run(filepath)
+    await asyncio.sleep(INFERENCE_DELAY)
+    return image.shape, upload.size
+
+
+def peak_rss_mb() -> float:
+    # В Linux ru_maxrss измеряется в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_mode(mode: str, source_path: str, uploads: int):
+    folder = tempfile.mkdtemp(prefix=f"uploads-{mode}-")
+    handler = legacy_upload if mode == "legacy" else streaming_upload
+    await PreprocessPool.start()
+    try:
+        files = [make_upload(source_path) for _ in range(uploads)]
+        baseline = peak_rss_mb()
+        await asyncio.gather(*(handler(img, folder, i) for i, img in enumerate(files)))
+        print(f"{mode:>9}: peak RSS {peak_rss_mb():.0f} MB (before uploads {baseline:.0f} MB)")
+    finally:
+        await PreprocessPool.stop()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--size-mb", type=float, default=10)
+    parser.add_argument("--mode", choices=["legacy", "streaming"])
+    parser.add_argument("--source")
+    args = parser.parse_args()
+
+    if args.mode:
+        asyncio.run(run_mode(args.mode, args.source, args.uploads))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "photo.jpg")
+        make_jpeg(source, args.size_mb)
+        print(f"{args.uploads} concurrent uploads of {os.path.getsize(source) / 1024 / 1024:.1f} MB")
+        for mode in ("legacy", "streaming"):
+            subprocess.run([sys.executable, "-m", "benchmarks.upload_memory", "--mode", mode,
+                            "--source", source, "--uploads", str(args.uploads)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Пересчёт таблицы порогов (thresholds.json) по размеченным изображениям.
+
+Разметка — выгрузка imagepicker (/export-csv: uid, userUid, defect_0..defect_7).
+Голоса пользователей по одному uid сводятся большинством; строки валидационных
+ответов (userUid с суффиксом _val) хранят совпадение с эталоном, а не разметку, и пропускаются.
+Вероятности классов считаются текущим бэкендом инференса (INFERENCE_BACKEND) и
+сохраняются в --predictions, чтобы повторная калибровка не гоняла модель заново.
+printer_id и quality берутся из таблицы print по имени файла изображения.
+
+Для каждого класса выбирается порог с максимальной F-мерой: сначала общий,
+затем для принтера и для пары (принтер, качество), если в группе хватает примеров
+и собственный порог заметно (--min-gain) лучше порога родительской группы.
+
+Запуск из папки web:
+    python calibrate_thresholds.py --labels imagepicker_data.csv --images /data/images \\
+        [--predictions predictions.npz] [--class-map 0,1,2,3,4,5,6] [--no-db] [--dry-run]
+Сервис подхватывает новый файл без перезапуска (см. Services/Thresholds.py).
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import BATCH_MAX_SIZE, THRESHOLDS_PATH
+from Services.Thresholds import DEFAULT_THRESHOLDS
+
+
+def load_labels(path: str, class_map: List[int], min_votes: int) -> Dict[str, np.ndarray]:
+    """
+    Сводит голоса разметчиков: класс считается присутствующим, если его отметило
+    больше половины пользователей, разметивших изображение
+    """
+    votes: Dict[str, np.ndarray] = {}
+    voters: Dict[str, int] = defaultdict(int)
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row["userUid"].endswith("_val"):
+                continue
+            marks = np.array([row[f"defect_{column}"].strip().lower() in ("true", "1") for column in class_map])
+            votes[row["uid"]] = votes.get(row["uid"], 0) + marks
+            voters[row["uid"]] += 1
+    return {
+        uid: (marks * 2 > voters[uid]).astype(np.int8)
+        for uid, marks in votes.items()
+        if voters[uid] >= min_votes
+    }
+
+
+async def predict(uids: List[str], images: str, cache_path: Optional[str]) -> Dict[str, np.ndarray]:
+    """
+    Вероятности классов для изображений; уже посчитанные берутся из cache_path (.npz)
+    """
+    cached: Dict[str, np.ndarray] = {}
+    if cache_path and os.path.exists(cache_path):
+        with np.load(cache_path) as data:
+            cached = {uid: data["probabilities"][i] for i, uid in enumerate(data["uids"])}
+
+    missing = [uid for uid in uids if uid not in cached and os.path.exists(os.path.join(images, uid))]
+    if missing:
+        # Бэкенд и предобработка нужны только для новых изображений
+        from Services.HttpClient import HttpClient
+        from Services.InferenceBackend import InferenceBackend
+        from Services.Preprocessing import preprocess_image
+
+        await HttpClient.start()
+        await InferenceBackend.start()
+        try:
+            for start in range(0, len(missing), BATCH_MAX_SIZE):
+                chunk = missing[start:start + BATCH_MAX_SIZE]
+                batch = np.stack([preprocess_image(os.path.join(images, uid)) for uid in chunk])
+                logits = await InferenceBackend.infer(batch)
+                if logits is None:
+                    raise RuntimeError("Inference backend returned an error")
+                for uid, row in zip(chunk, 1 / (1 + np.exp(-logits.reshape(len(chunk), -1)))):
+                    cached[uid] = row.astype(np.float32)
+                print(f"Predicted {min(start + BATCH_MAX_SIZE, len(missing))}/{len(missing)}")
+        finally:
+            await InferenceBackend.stop()
+            await HttpClient.close()
+
+        if cache_path:
+            np.savez(cache_path, uids=np.array(list(cached)), probabilities=np.stack(list(cached.values())))
+
+    return {uid: cached[uid] for uid in uids if uid in cached}
+
+
+async def load_print_keys(uids: List[str]) -> Dict[str, Tuple[int, int]]:
+    """
+    (printer_id, quality) изображений из таблицы print по имени файла
+    """
+    from sqlalchemy import select
+    from database import engine
+    from Models.Print import Print
+
+    wanted = set(uids)
+    keys = {}
+    async with engine.connect() as conn:
+        result = await conn.stream(select(Print.img_path, Print.printer_id, Print.quality))
+        async for img_path, printer_id, quality in result:
+            name = os.path.basename(img_path)
+            if name in wanted:
+                keys[name] = (printer_id, quality)
+    await engine.dispose()
+    return keys
+
+
+def best_thresholds(scores: np.ndarray, labels: np.ndarray, beta: float, min_positives: int) -> List[Optional[float]]:
+    """
+    Для каждого класса — порог с максимальной F-мерой (None, если положительных примеров мало).
+    Все точки отсечения перебираются сразу: примеры сортируются по убыванию
+    вероятности и TP/FP считаются накопленными суммами
+    """
+    result = []
+    weight = beta * beta
+    for column in range(scores.shape[1]):
+        y = labels[:, column]
+        positives = int(y.sum())
+        if positives < min_positives:
+            result.append(None)
+            continue
+        order = np.argsort(-scores[:, column], kind="stable")
+        s = scores[order, column]
+        tp = np.cumsum(y[order])
+        fp = np.arange(1, len(s) + 1) - tp
+        fbeta = (1 + weight) * tp / ((1 + weight) * tp + weight * (positives - tp) + fp)
+        # Порог можно провести только между разными значениями вероятности
+        fbeta[:-1][s[:-1] == s[1:]] = -1
+        i = int(np.argmax(fbeta))
+        # Правило детектора — probability > threshold, поэтому порог берётся между s[i] и s[i + 1]
+        threshold = (s[i] + s[i + 1]) / 2 if i + 1 < len(s) else np.nextafter(s[i], -np.inf)
+        result.append(float(threshold))
+    return result
+
+
+def fbeta_scores(scores: np.ndarray, labels: np.ndarray, thresholds: np.ndarray, beta: float) -> np.ndarray:
+    predicted = scores > thresholds
+    tp = (predicted & (labels == 1)).sum(axis=0)
+    fp = (predicted & (labels == 0)).sum(axis=0)
+    fn = (~predicted & (labels == 1)).sum(axis=0)
+    weight = beta * beta
+    denominator = (1 + weight) * tp + weight * fn + fp
+    return np.divide((1 + weight) * tp, denominator, out=np.zeros(len(tp)), where=denominator > 0)
+
+
+def calibrate(scores, labels, keys, parent: List[float], args) -> Tuple[List[float], list]:
+    """
+    Общие пороги и переопределения по принтерам и парам (принтер, качество).
+    Классы, для которых в группе мало данных, наследуют порог родительской группы
+    """
+    default = [value if value is not None else parent[i]
+               for i, value in enumerate(best_thresholds(scores, labels, args.beta, args.min_positives))]
+
+    def group_thresholds(mask, base):
+        if mask.sum() < args.min_samples:
+            return None
+        values = best_thresholds(scores[mask], labels[mask], args.beta, args.min_positives)
+        candidate = np.array([value if value is not None else base[i] for i, value in enumerate(values)])
+        # Переопределяем класс, только если F-мера в группе заметно лучше, чем с порогом родителя
+        gain = (fbeta_scores(scores[mask], labels[mask], candidate, args.beta)
+                - fbeta_scores(scores[mask], labels[mask], np.array(base), args.beta))
+        merged = np.where(gain >= args.min_gain, candidate, base).tolist()
+        return merged if merged != list(base) else None
+
+    overrides = []
+    if keys is not None:
+        printer_ids = np.array([key[0] for key in keys])
+        qualities = np.array([key[1] for key in keys])
+        for printer_id in sorted(set(printer_ids.tolist())):
+            printer_mask = printer_ids == printer_id
+            printer_values = group_thresholds(printer_mask, default)
+            if printer_values is not None:
+                overrides.append({"printer_id": printer_id, "quality": None, "thresholds": printer_values})
+            base = printer_values or default
+            for quality in sorted(set(qualities[printer_mask].tolist())):
+                values = group_thresholds(printer_mask & (qualities == quality), base)
+                if values is not None:
+                    overrides.append({"printer_id": printer_id, "quality": quality, "thresholds": values})
+    return default, overrides
+
+
+def current_default(path: str, classes: int) -> List[float]:
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["default"]
+    return DEFAULT_THRESHOLDS[:classes]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Calibrate per-printer defect thresholds from labelled data")
+    parser.add_argument("--labels", required=True, help="CSV-выгрузка imagepicker")
+    parser.add_argument("--images", required=True, help="Папка с размеченными изображениями (uid — имя файла)")
+    parser.add_argument("--predictions", help="Кэш вероятностей .npz")
+    parser.add_argument("--class-map", default=",".join(str(i) for i in range(len(DEFAULT_THRESHOLDS))),
+                        help="Номер столбца defect_N разметки для каждого выхода модели")
+    parser.add_argument("--min-votes", type=int, default=1, help="Минимум разметчиков на изображение")
+    parser.add_argument("--min-samples", type=int, default=50, help="Минимум изображений в группе для переопределения")
+    parser.add_argument("--min-positives", type=int, default=5, help="Минимум положительных примеров класса")
+    parser.add_argument("--min-gain", type=float, default=0.02,
+                        help="Минимальный прирост F-меры в группе для переопределения порога класса")
+    parser.add_argument("--beta", type=float, default=1.0, help="F-beta: >1 важнее полнота, <1 — точность")
+    parser.add_argument("--no-db", action="store_true", help="Только общие пороги, без printer_id/quality")
+    parser.add_argument("--output", default=THRESHOLDS_PATH)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    class_map = [int(value) for value in args.class_map.split(",")]
+    labels_by_uid = load_labels(args.labels, class_map, args.min_votes)
+    probabilities = await predict(sorted(labels_by_uid), args.images, args.predictions)
+    print_keys = None if args.no_db else await load_print_keys(list(probabilities))
+
+    uids = [uid for uid in probabilities if print_keys is None or uid in print_keys]
+    if not uids:
+        raise SystemExit("No labelled images with predictions found")
+    scores = np.stack([probabilities[uid] for uid in uids])
+    labels = np.stack([labels_by_uid[uid] for uid in uids])
+    keys = [print_keys[uid] for uid in uids] if print_keys is not None else None
+
+    previous = current_default(args.output, len(class_map))
+    default, overrides = calibrate(scores, labels, keys, previous, args)
+
+    before = fbeta_scores(scores, labels, np.array(previous), args.beta)
+    after = fbeta_scores(scores, labels, np.array(default), args.beta)
+    print(f"{len(uids)} images, {len(overrides)} overrides")
+    for i, (old, new) in enumerate(zip(before, after)):
+        print(f"class {i}: positives={int(labels[:, i].sum())} F{args.beta:g} {old:.3f} -> {new:.3f} "
+              f"(threshold {previous[i]:.5f} -> {default[i]:.5f})")
+
+    table = {
+        "classes": len(default),
+        "default": default,
+        "overrides": overrides,
+        "calibration": {"images": len(uids), "beta": args.beta, "labels": os.path.basename(args.labels)},
+    }
+    if args.dry_run:
+        print(json.dumps(table, indent=2))
+        return
+
+    # Атомарная замена: сервис не должен прочитать файл, записанный наполовину
+    temp_path = f"{args.output}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(table, f, indent=2)
+    os.replace(temp_path, args.output)
+    print(f"Written {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
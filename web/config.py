@@ -0,0 +1,165 @@
+import os
+
+# Настройки сервиса, переопределяемые через переменные окружения
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# =================== База данных ===================
+# Те же переменные DB_* читают web_user и imagepicker (src/Config/db.py)
+
+# Логирование каждого SQL-запроса только для отладки
+DB_ECHO = _env_bool("DB_ECHO", False)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "2"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Пересоздаём соединения старше указанного числа секунд
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+# Кэш подготовленных выражений asyncpg на соединение
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+# Ограничение времени выполнения одного запроса на стороне PostgreSQL (мс)
+DB_STATEMENT_TIMEOUT_MS = os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000")
+
+# =================== Triton Inference Server ===================
+
+TRITON_URL = os.getenv(
+    "TRITON_URL", "http://triton_inference_server:8000/v2/models/defect_detection_model/infer"
+)
+# Режим передачи тензоров: "binary" — расширение binary-data протокола KServe v2,
+# "json" — тензор передаётся списком чисел в JSON (запасной вариант)
+TRITON_TRANSPORT = os.getenv("TRITON_TRANSPORT", "binary").lower()
+TRITON_INPUT_NAME = os.getenv("TRITON_INPUT_NAME", "input__0")
+TRITON_MODEL_NAME = os.getenv("TRITON_MODEL_NAME", "defect_detection_model")
+# gRPC-эндпоинт Triton (host:port) для INFERENCE_BACKEND=triton_grpc
+TRITON_GRPC_URL = os.getenv("TRITON_GRPC_URL", "triton_inference_server:8001")
+# Отправлять запросы через один долгоживущий двунаправленный поток (ModelStreamInfer)
+# вместо отдельного unary-вызова на каждый батч
+TRITON_GRPC_STREAMING = _env_bool("TRITON_GRPC_STREAMING", True)
+# Интервал keepalive-пингов постоянного канала (мс) и таймаут запроса (с)
+TRITON_GRPC_KEEPALIVE_MS = int(os.getenv("TRITON_GRPC_KEEPALIVE_MS", "30000"))
+TRITON_GRPC_TIMEOUT = float(os.getenv("TRITON_GRPC_TIMEOUT", "30"))
+
+# =================== Бэкенд инференса ===================
+
+# "triton" — HTTP-запросы к Triton, "triton_grpc" — gRPC к Triton
+# (требует requirements-triton-grpc.txt — образ собирается с INFERENCE_EXTRAS=triton-grpc),
+# "onnx" — ONNX Runtime на CPU внутри процесса
+# (требует requirements-onnx.txt — образ собирается с INFERENCE_EXTRAS=onnx — и экспортированную модель,
+# см. export_onnx.py)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "triton").lower()
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", "/workspace/models/defect_detection_model.onnx")
+# Потоки внутри одного оператора и между независимыми операторами графа.
+# При нескольких воркерах uvicorn intra_op стоит уменьшить: ядра делятся между процессами
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", str(os.cpu_count() or 1)))
+ONNX_INTER_OP_THREADS = int(os.getenv("ONNX_INTER_OP_THREADS", "1"))
+# Сколько батчей исполняется одновременно (каждый использует ONNX_INTRA_OP_THREADS потоков)
+ONNX_CONCURRENCY = int(os.getenv("ONNX_CONCURRENCY", "1"))
+
+# =================== Исходящие HTTP-запросы ===================
+
+# Общее число соединений в пуле и ограничение на один хост
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "32"))
+# Сколько секунд держать простаивающее соединение открытым
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+# Таймауты (в секундах) на установку соединения и на весь запрос
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "30"))
+
+# =================== Динамический батчинг инференса ===================
+
+# Одновременные загрузки собираются в один запрос [N, 3, 500, 500] к Triton
+BATCH_ENABLED = _env_bool("BATCH_ENABLED", True)
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+# Максимальное время ожидания (мс) дополнительных запросов после первого в батче
+BATCH_MAX_DELAY_MS = float(os.getenv("BATCH_MAX_DELAY_MS", "5"))
+
+# =================== Предобработка изображений ===================
+
+# Пул для декодирования и предобработки: "thread" или "process".
+# Буфер результата переиспользуется только в "process" (см. Services/Preprocessing.py)
+PREPROCESS_EXECUTOR = os.getenv("PREPROCESS_EXECUTOR", "thread").lower()
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", str(os.cpu_count() or 1)))
+# Максимум изображений в очереди пула; сверх этого запросы получают 429
+PREPROCESS_QUEUE_SIZE = int(os.getenv("PREPROCESS_QUEUE_SIZE", "64"))
+# Для JPEG уменьшать изображение прямо при декодировании (Image.draft). Быстрее на больших снимках,
+# но вход модели перестаёт совпадать с torchvision: на 4032x3024 среднее |diff| ~7e-3 против ~5e-7
+# (см. benchmarks/preprocessing_parity.py), поэтому включать только после проверки точности модели
+PREPROCESS_JPEG_DRAFT = _env_bool("PREPROCESS_JPEG_DRAFT", False)
+
+# =================== Пороги классов дефектов ===================
+
+# JSON-таблица порогов: общие значения и переопределения по (printer_id, quality).
+# Файл перечитывается при изменении (проверка не чаще раза в THRESHOLDS_RELOAD_INTERVAL сек);
+# пересчитывается скриптом calibrate_thresholds.py
+THRESHOLDS_PATH = os.getenv("THRESHOLDS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json"))
+THRESHOLDS_RELOAD_INTERVAL = float(os.getenv("THRESHOLDS_RELOAD_INTERVAL", "5"))
+
+# =================== Кэш результатов распознавания ===================
+
+# Версия модели входит в ключ кэша: при обновлении модели старые результаты не используются
+MODEL_VERSION = os.getenv("MODEL_VERSION", "1")
+# Хранилище кэша: "memory", "redis" или "none". Кэш "memory" свой в каждом процессе: при 10 воркерах
+# uvicorn (см. Dockerfile) повторная загрузка попадает в кэш примерно в 1 случае из 10.
+# "redis" общий для всех воркеров (сервис Redis по RESULT_CACHE_REDIS_URL)
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory").lower()
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "10000"))
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "86400"))
+RESULT_CACHE_REDIS_URL = os.getenv("RESULT_CACHE_REDIS_URL", "redis://redis:6379/0")
+
+# =================== Загрузка изображений ===================
+
+# Папка для загрузки файлов
+UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "/uploads")
+
+# Максимальный размер загружаемого изображения (байт); больше — ответ 413
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(20 * 1024 * 1024)))
+# Размер блока при потоковой записи загрузки на диск
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+# Хранилище загрузок: файлы раскладываются по подпапкам по префиксу хэша содержимого
+# (/uploads/ab/cd/abcd....jpg); глубина и ширина префикса настраиваются
+STORAGE_SHARD_DEPTH = int(os.getenv("STORAGE_SHARD_DEPTH", "2"))
+STORAGE_SHARD_WIDTH = int(os.getenv("STORAGE_SHARD_WIDTH", "2"))
+# Сколько символов SHA-256 используется в имени файла (32 hex = 128 бит).
+# Имя должно помещаться в callback_data Telegram (64 байта) в боте val_detect
+STORAGE_NAME_LENGTH = int(os.getenv("STORAGE_NAME_LENGTH", "32"))
+
+# =================== Кэш каталога принтеров ===================
+
+# Страховочное время жизни кэша (сек), если уведомления об изменениях не доходят
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+# Заголовок Cache-Control для ответов /api/printers/
+CATALOG_CACHE_CONTROL = os.getenv("CATALOG_CACHE_CONTROL", "public, max-age=60, must-revalidate")
+# Сбрасывать кэш во всех воркерах через PostgreSQL LISTEN/NOTIFY
+CATALOG_LISTEN_NOTIFY = _env_bool("CATALOG_LISTEN_NOTIFY", True)
+# Пауза перед повторным подключением LISTEN после обрыва (сек): удваивается до максимума
+CATALOG_LISTEN_RETRY_MIN = float(os.getenv("CATALOG_LISTEN_RETRY_MIN", "1"))
+CATALOG_LISTEN_RETRY_MAX = float(os.getenv("CATALOG_LISTEN_RETRY_MAX", "60"))
+
+# =================== Массовый импорт принтеров ===================
+
+# Максимум строк в одном запросе /api/printers/bulk
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "100000"))
+
+# =================== Асинхронные задания распознавания ===================
+
+# Число задач-обработчиков очереди в каждом воркере uvicorn (0 — не обрабатывать)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Пауза между опросами пустой очереди (сек)
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+# Через сколько секунд задание в статусе running считается брошенным и забирается снова
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Пауза перед повторной попыткой после ошибки (сек): удваивается с каждой попыткой
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "5"))
+# Пауза, если очередь предобработки переполнена (429): попытка при этом не расходуется
+JOB_BACKPRESSURE_DELAY = float(os.getenv("JOB_BACKPRESSURE_DELAY", "1"))
+# Максимальное время long-poll в GET /api/prints/jobs/{id}?wait=...
+JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "30"))
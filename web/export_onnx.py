@@ -0,0 +1,56 @@
+"""
+Экспорт модели дефектов из репозитория Triton (TorchScript model.pt) в ONNX
+для бэкенда INFERENCE_BACKEND=onnx.
+
+Запуск из папки web (нужны torch и onnxruntime):
+    python export_onnx.py --model /workspace/model_repository/defect_detection_model/1/model.pt \\
+        --output /workspace/models/defect_detection_model.onnx
+После экспорта выходы ONNX Runtime сравниваются с TorchScript на случайном батче.
+"""
+import argparse
+import os
+
+import numpy as np
+
+from Services.Preprocessing import INPUT_SIZE
+
+
+def export(model_path: str, output_path: str, opset: int, batch_size: int) -> float:
+    import onnxruntime as ort
+    import torch
+
+    model = torch.jit.load(model_path, map_location="cpu").eval()
+    example = torch.randn(batch_size, 3, *INPUT_SIZE)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    torch.onnx.export(
+        model,
+        example,
+        output_path,
+        input_names=["input__0"],
+        output_names=["output__0"],
+        # Размер батча задаётся при каждом вызове (динамический батчинг)
+        dynamic_axes={"input__0": {0: "batch"}, "output__0": {0: "batch"}},
+        opset_version=opset,
+        # Модель из Triton — TorchScript, поэтому используется экспорт через трассировку
+        dynamo=False,
+    )
+
+    # Сверка результатов TorchScript и ONNX Runtime
+    with torch.no_grad():
+        expected = model(example).numpy()
+    session = ort.InferenceSession(output_path, providers=["CPUExecutionProvider"])
+    actual = session.run(None, {session.get_inputs()[0].name: example.numpy()})[0]
+    return float(np.abs(expected - actual).max())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True, help="TorchScript-модель из репозитория Triton")
+    parser.add_argument("--output", default=os.getenv("ONNX_MODEL_PATH", "defect_detection_model.onnx"))
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--batch-size", type=int, default=2, help="Размер батча для трассировки и сверки")
+    args = parser.parse_args()
+
+    max_diff = export(args.model, args.output, args.opset, args.batch_size)
+    print(f"Exported {args.output}, max abs diff vs TorchScript: {max_diff:.2e}")
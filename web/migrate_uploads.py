@@ -0,0 +1,106 @@
+"""
+Перенос загрузок из плоской папки /uploads в хранилище по хэшу содержимого
+(см. Services/Storage.py) с обновлением print.img_path.
+
+Запуск из папки web (внутри контейнера web):
+    python migrate_uploads.py [--root /uploads] [--batch-size 500] [--dry-run]
+Повторный запуск безопасен: уже перенесённые файлы не затрагиваются.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+
+from sqlalchemy import bindparam
+
+from config import UPLOAD_FOLDER
+from database import engine
+from Models.Print import Print
+from Controllers.PrintController import PrintController
+from Services.Storage import ShardedFileStorage
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def flat_files(root: str):
+    """
+    Изображения, лежащие прямо в корне хранилища (без подпапок и временных файлов)
+    """
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_file() and not entry.name.startswith('.') and PrintController.allowed_file(entry.name):
+                yield entry.path
+
+
+async def migrate_batch(storage: ShardedFileStorage, batch, dry_run: bool) -> int:
+    moves = []
+    for old_path in batch:
+        ext = old_path.rsplit('.', 1)[1]
+        moves.append({"old_path": old_path, "new_path": storage.path_for(file_sha256(old_path), ext)})
+
+    if dry_run:
+        for move in moves:
+            print(f"{move['old_path']} -> {move['new_path']}")
+        return len(moves)
+
+    statement = (
+        Print.__table__.update()
+        .where(Print.img_path == bindparam("old_path"))
+        .values(img_path=bindparam("new_path"))
+    )
+    moved = []
+    duplicates = []
+    try:
+        # Файлы переносятся внутри транзакции; при любой ошибке, включая ошибку коммита,
+        # они возвращаются на место, чтобы print.img_path продолжал на них указывать
+        async with engine.begin() as conn:
+            await conn.execute(statement, moves)
+            for move in moves:
+                if os.path.exists(move["new_path"]):
+                    # Дубликат уже сохранённого изображения удаляем после коммита
+                    duplicates.append(move["old_path"])
+                    continue
+                os.makedirs(os.path.dirname(move["new_path"]), exist_ok=True)
+                os.replace(move["old_path"], move["new_path"])
+                moved.append(move)
+    except BaseException:
+        for move in reversed(moved):
+            os.replace(move["new_path"], move["old_path"])
+        raise
+
+    for path in duplicates:
+        os.remove(path)
+    return len(moves)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Migrate flat uploads to the sharded storage layout")
+    parser.add_argument("--root", default=UPLOAD_FOLDER)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    storage = ShardedFileStorage(args.root)
+    total = 0
+    batch = []
+    # Список собирается заранее: папка меняется по ходу переноса
+    for path in list(flat_files(args.root)):
+        batch.append(path)
+        if len(batch) >= args.batch_size:
+            total += await migrate_batch(storage, batch, args.dry_run)
+            batch = []
+    if batch:
+        total += await migrate_batch(storage, batch, args.dry_run)
+
+    await engine.dispose()
+    print(f"Migrated {total} files")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())